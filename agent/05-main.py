@@ -53,14 +53,14 @@ def main() -> None:
         1. Use the `check_endpoint_health` tool on {args.webapp_url}.
         2. If the result indicates the endpoint is healthy (status 200 OK), wait {args.interval} seconds and repeat step 1.
         3. If the result indicates the endpoint is unhealthy (status not 200 OK or 500 error):
-            a. Use the `get_container_logs` tool on the container '{args.monitored_container}' to retrieve recent logs.
-            b. Analyze the logs for signs of a crash or error (look for keywords like "error", "exception", "crash", or stack traces).
+            a. Use the `diagnose_service` tool on the container '{args.monitored_container}' with url {args.webapp_url}. It returns the health check, recent errors, container state, resource usage and configuration in one report.
+            b. Analyze the report for signs of a crash or error (error log lines, tracebacks, an exited or restarting container, resource exhaustion).
+               If you need more detail on the logs, use the `get_log_digest` tool on '{args.monitored_container}', then `get_log_samples` for a template id.
             c. If a crash or error is detected in the logs:
-                i. Use the `restart_container` tool on '{args.monitored_container}'.
-                ii. After restarting, use the `check_endpoint_health` tool again on {args.webapp_url}.
-                iii. If the endpoint is now healthy, resume monitoring as in step 1.
-                iv. If the endpoint is still unhealthy, use the `send_slack_alert` tool to notify the team with a summary of the issue.
-            d. If no crash or error is detected in the logs, use the `send_slack_alert` tool to notify the team with the log output and health check result.
+                i. Use the `restart_container` tool on '{args.monitored_container}' with readiness "health" and target {args.webapp_url}. It waits until the endpoint is healthy again.
+                ii. If the container is ready, resume monitoring as in step 1.
+                iii. If it is not ready or the restart was refused, use the `send_slack_alert` tool to notify the team with a summary of the issue. Do not restart it again.
+            d. If no crash or error is detected in the logs, use the `send_slack_alert` tool to notify the team with the diagnostics report.
 
         Always use the appropriate tool for each step and provide clear, concise output for each action.
         """
@@ -0,0 +1,10 @@
+import os
+import sys
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(os.path.dirname(AGENT_DIR), "app")
+
+# Tests run against the agent's ``tools`` package and, where they need real
+# log output, the app's ``core`` package
+sys.path.insert(0, AGENT_DIR)
+sys.path.append(APP_DIR)
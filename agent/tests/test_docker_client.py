@@ -0,0 +1,9 @@
+import types
+
+from tools.docker_client import redacted_env
+
+
+def test_redacted_env_hides_secrets_and_url_credentials():
+    container = types.SimpleNamespace(attrs={"Config": {"Env": ["DATABASE_URL=postgresql://app:s3cret@db/app", "API_KEY=abc", "PATH=/usr/bin"]}})
+
+    assert redacted_env(container) == {"DATABASE_URL": "postgresql://<redacted>@db/app", "API_KEY": "<redacted>", "PATH": "/usr/bin"}
@@ -0,0 +1,70 @@
+import types
+
+import pytest
+
+from tools import fleet
+from tools.fleet import FleetSnapshots, listed_summary, parse_human_duration
+
+
+class FakeDockerCache:
+    def __init__(self):
+        self.listed = []
+        self.restarts = {}
+        self.inspected = []
+        self.client = types.SimpleNamespace(containers=types.SimpleNamespace(list=lambda **kwargs: self.listed))
+
+    def set(self, *entries):
+        self.listed = [types.SimpleNamespace(id=name, attrs={"Names": [f"/{name}"], "State": state, "Status": status}) for name, state, status in entries]
+
+    def get(self, name):
+        self.inspected.append(name)
+        return types.SimpleNamespace(attrs={"RestartCount": self.restarts.get(name, 0)})
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = FakeDockerCache()
+    monkeypatch.setattr(fleet, "docker_cache", cache)
+    return cache
+
+
+@pytest.mark.parametrize("text, seconds", [
+    ("Less than a second", 0.0),
+    ("About a minute", 60.0),
+    ("5 minutes", 300.0),
+    ("About an hour", 3600.0),
+    ("3 days", 3 * 86400.0),
+    ("sometime", None),
+])
+def test_parse_human_duration(text, seconds):
+    assert parse_human_duration(text) == seconds
+
+
+def test_listed_summary_parses_the_status_text():
+    assert listed_summary({"State": "running", "Status": "Up 2 hours (healthy)"}) == {"state": "running", "health": "healthy", "restarts": None, "exit_code": None, "uptime": 7200.0}
+    assert listed_summary({"State": "running", "Status": "Up 3 seconds (health: starting)"})["health"] == "starting"
+    exited = listed_summary({"State": "exited", "Status": "Exited (137) 5 minutes ago"})
+    assert (exited["exit_code"], exited["uptime"]) == (137, None)
+
+
+def test_snapshot_inspects_only_when_the_restart_count_is_needed(cache):
+    snapshots = FleetSnapshots()
+    cache.set(("web", "running", "Up 3 days (healthy)"), ("worker", "restarting", "Restarting (1) 2 seconds ago"), ("fresh", "running", "Up 10 seconds"))
+    cache.restarts = {"worker": 4, "fresh": 1}
+
+    current, diff = snapshots.snapshot()
+
+    assert diff is None
+    assert sorted(cache.inspected) == ["fresh", "worker"]
+    assert {name: summary["restarts"] for name, summary in current.items()} == {"web": None, "worker": 4, "fresh": 1}
+    assert "restarts" not in fleet.format_snapshot(current, diff).splitlines()[1]
+
+    cache.inspected.clear()
+    cache.set(("web", "running", "Up 3 days (healthy)"), ("worker", "exited", "Exited (1) 1 second ago"), ("fresh", "running", "Up 15 minutes"))
+    cache.restarts["worker"] = 5
+
+    current, diff = snapshots.snapshot()
+
+    assert cache.inspected == ["worker"]
+    assert current["fresh"]["restarts"] == 1
+    assert diff["changed"] == {"worker": {"state": ("restarting", "exited"), "restarts": (4, 5)}}
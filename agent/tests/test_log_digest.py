@@ -0,0 +1,80 @@
+import io
+
+import pytest
+
+from tools.log_digest import Drain, LogDigester
+from tools.log_tailer import LogLine, line_level
+
+
+def _lines(texts):
+    return [LogLine(seq, f"2024-01-01T00:00:{seq % 60:02d}Z", line_level(text), text) for seq, text in enumerate(texts, 1)]
+
+
+def test_new_template_survives_a_full_leaf():
+    digester = LogDigester(max_children=3)
+    # Same token count and first two tokens, so all four share one leaf
+    digester.digest(_lines([
+        "app: request alpha beta gamma delta",
+        "app: request one two three four",
+        "app: request red green blue black",
+    ]))
+    assert len(digester.drain.clusters) == 3
+
+    digest = digester.digest([LogLine(4, "2024-01-01T00:01:00Z", "ERROR", "app: request database connection refused now")])
+
+    assert [(entry["template"], entry["level"]) for entry in digest["templates"]] == [("app: request database connection refused now", "ERROR")]
+    assert digest["templates"][0]["new"]
+    assert len(digester.drain.clusters) == 3
+
+
+def test_full_leaf_evicts_the_least_used_template():
+    drain = Drain(max_children=2)
+    for text in ["app: job busy a b", "app: job busy a b", "app: job rare c d"]:
+        drain.add(LogLine(1, "", None, text))
+
+    cluster, created = drain.add(LogLine(2, "", None, "app: job fresh e f"))
+
+    assert created
+    assert cluster.id in drain.clusters
+    assert sorted(cluster.template for cluster in drain.clusters.values()) == ["app: job busy a b", "app: job fresh e f"]
+
+
+def test_digest_of_request_logging_output():
+    flask = pytest.importorskip("flask")
+    from core.request_logging import RequestLogging
+
+    out = io.StringIO()
+    app = flask.Flask("digest-test")
+    request_logging = RequestLogging("INFO", 100, out)
+    request_logging.init_app(app)
+
+    @app.route("/boom")
+    def boom():
+        return 1 / 0
+
+    @app.route("/ok")
+    def ok():
+        return "ok"
+
+    client = app.test_client()
+    for _ in range(3):
+        assert client.get("/boom").status_code == 500
+        assert client.get("/ok").status_code == 200
+        assert client.get("/ok").status_code == 200
+    request_logging.listener.stop()
+
+    digest = LogDigester().digest(_lines(out.getvalue().splitlines()))
+
+    assert digest["lines"] == 12
+    assert len(digest["tracebacks"]) == 1
+    trace = digest["tracebacks"][0]
+    assert trace["count"] == 3
+    assert trace["exception"] == "ZeroDivisionError"
+    assert trace["location"].endswith(":boom")
+    counts = {entry["template"]: entry["count"] for entry in digest["templates"]}
+    # Every access line is kept, and a 500 never shares a template with a 200
+    access = {template: count for template, count in counts.items() if " request " in template}
+    assert sorted(access.values()) == [3, 6]
+    assert any("status=500" in template for template in access)
+    assert any("status=200" in template for template in access)
+    assert not any("Traceback" in template for template in counts)
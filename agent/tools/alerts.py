@@ -0,0 +1,223 @@
+import heapq
+import itertools
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import typing as typ
+
+import requests
+
+logger = logging.getLogger("alerts")
+
+
+class DeliveryError(Exception):
+    """
+    A destination failed to deliver.
+
+    ``retry_after`` overrides the backoff when set; a ``permanent`` failure
+    (e.g. a 4xx reply) is not retried.
+    """
+
+    def __init__(self, message: str, retry_after: typ.Optional[float] = None, permanent: bool = False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.permanent = permanent
+
+
+class WebhookDestination:
+    """Posts ``{"text": ...}`` to an incoming webhook (Slack format, or a local stub in tests)."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def send(self, text: str):
+        try:
+            response = self.session.post(self.url, json={"text": text}, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise DeliveryError(str(e))
+        if response.status_code == 429 or response.status_code >= 500:
+            retry_after = response.headers.get("Retry-After")
+            raise DeliveryError(f"webhook returned {response.status_code}", float(retry_after) if retry_after else None)
+        if response.status_code >= 400:
+            # Client errors will not succeed on retry
+            raise DeliveryError(f"webhook returned {response.status_code}: {response.text[:200]}", permanent=True)
+
+
+class LogDestination:
+    """Writes alerts to the ``alerts`` logger; used when no webhook is configured."""
+
+    def send(self, text: str):
+        logger.warning("ALERT: %s", text)
+
+
+class RateLimit:
+    """Token bucket: ``per_minute`` sends a minute on average, bursts up to ``burst``."""
+
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = per_minute / 60
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def wait_time(self) -> float:
+        """Take a token and return 0, or return how long until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AlertDispatcher:
+    """
+    Sends alerts from a background worker so callers never wait on the network.
+
+    ``submit`` only takes a lock and enqueues. The first alert with a given
+    text goes out right away; identical alerts within ``coalesce_window``
+    seconds are counted and sent as one "repeated N times" message when the
+    window closes, after the first one has gone out. Each destination has its
+    own token-bucket rate limit, and failed deliveries are retried with
+    exponential backoff and jitter (or the destination's ``Retry-After``) up
+    to ``max_retries`` times. At most ``queue_size`` alerts are pending
+    (queued, waiting on the rate limit or on a retry); beyond that new alerts
+    are dropped and counted.
+    """
+
+    def __init__(self, destinations: typ.Dict[str, typ.Any], coalesce_window: float = 60.0, rate_per_minute: float = 20.0, burst: int = 5, max_retries: int = 5, backoff: float = 1.0, max_backoff: float = 60.0, queue_size: int = 1000):
+        self.destinations = destinations
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.queue_size = queue_size
+        self._limits = {name: RateLimit(rate_per_minute, burst) for name in destinations}
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        # Ids of alerts queued or delayed; at most queue_size
+        self._in_flight: typ.Set[int] = set()
+        # key -> [text, destination, window end, repeats in the window, id of the first alert]
+        self._groups: typ.Dict[typ.Tuple[str, str], list] = {}
+        # Window summaries waiting for their first alert to be delivered: alert id -> (text, destination)
+        self._held: typ.Dict[int, typ.Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._worker: typ.Optional[threading.Thread] = None
+        self.counters = {"submitted": 0, "coalesced": 0, "sent": 0, "retried": 0, "failed": 0, "dropped": 0}
+
+    def submit(self, text: str, destination: str = "default") -> str:
+        """Queue ``text`` for ``destination``; returns "queued", "coalesced" or "dropped"."""
+        if destination not in self.destinations:
+            raise ValueError(f"Unknown alert destination: {destination}")
+        self._ensure_worker()
+        now = time.monotonic()
+        key = (destination, text.strip())
+        with self._lock:
+            self.counters["submitted"] += 1
+            group = self._groups.get(key)
+            if group is not None and now < group[2]:
+                group[3] += 1
+                self.counters["coalesced"] += 1
+                return "coalesced"
+            alert_id = self._enqueue(text, destination)
+            if alert_id is None:
+                return "dropped"
+            self._groups[key] = [text, destination, now + self.coalesce_window, 0, alert_id]
+        return "queued"
+
+    def _enqueue(self, text: str, destination: str) -> typ.Optional[int]:
+        # Caller must hold self._lock; returns the alert id, or None when dropped
+        if len(self._in_flight) >= self.queue_size:
+            self.counters["dropped"] += 1
+            return None
+        alert_id = next(self._ids)
+        self._in_flight.add(alert_id)
+        self._queue.put_nowait((alert_id, text, destination))
+        return alert_id
+
+    def _done(self, alert_id: int):
+        """The alert was sent or given up on; release its slot and its held summary."""
+        with self._lock:
+            self._in_flight.discard(alert_id)
+            summary = self._held.pop(alert_id, None)
+            if summary is not None:
+                self._enqueue(*summary)
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+                    self._worker.start()
+
+    def _flush_windows(self, now: float):
+        """Queue a summary for every closed window that had repeats, once its first alert is out."""
+        with self._lock:
+            closed = [(key, group) for key, group in self._groups.items() if now >= group[2]]
+            for key, (text, destination, _, repeats, alert_id) in closed:
+                del self._groups[key]
+                if not repeats:
+                    continue
+                summary = (f"{text} (repeated {repeats} more times in the last {self.coalesce_window:.0f}s)", destination)
+                if alert_id in self._in_flight:
+                    self._held[alert_id] = summary
+                else:
+                    self._enqueue(*summary)
+
+    def _run(self):
+        # Deliveries waiting on a rate limit or a retry: (ready at, alert id, text, destination, attempt).
+        # Bounded because every entry is one of the queue_size pending alerts.
+        delayed: typ.List[tuple] = []
+        while True:
+            now = time.monotonic()
+            self._flush_windows(now)
+            while delayed and delayed[0][0] <= now:
+                _, alert_id, text, destination, attempt = heapq.heappop(delayed)
+                self._deliver(alert_id, text, destination, attempt, delayed)
+            timeout = min(delayed[0][0] - now if delayed else 1.0, 1.0)
+            try:
+                alert_id, text, destination = self._queue.get(timeout=max(timeout, 0.01))
+            except queue.Empty:
+                continue
+            self._deliver(alert_id, text, destination, 0, delayed)
+
+    def _deliver(self, alert_id: int, text: str, destination: str, attempt: int, delayed: typ.List[tuple]):
+        wait = self._limits[destination].wait_time()
+        if wait > 0:
+            heapq.heappush(delayed, (time.monotonic() + wait, alert_id, text, destination, attempt))
+            return
+        try:
+            self.destinations[destination].send(text)
+        except Exception as e:
+            if attempt >= self.max_retries or getattr(e, "permanent", False):
+                logger.error("Dropping alert for %s after %d attempts: %s", destination, attempt + 1, e)
+                with self._lock:
+                    self.counters["failed"] += 1
+                self._done(alert_id)
+                return
+            delay = getattr(e, "retry_after", None) or min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+            heapq.heappush(delayed, (time.monotonic() + delay, alert_id, text, destination, attempt + 1))
+            with self._lock:
+                self.counters["retried"] += 1
+            return
+        with self._lock:
+            self.counters["sent"] += 1
+        self._done(alert_id)
+
+
+def _default_destination():
+    url = os.getenv("SLACK_WEBHOOK_URL")
+    return WebhookDestination(url) if url else LogDestination()
+
+
+alert_dispatcher = AlertDispatcher(
+    {"default": _default_destination()},
+    coalesce_window=float(os.getenv("ALERT_COALESCE_WINDOW", "60")),
+    rate_per_minute=float(os.getenv("ALERT_RATE_PER_MINUTE", "20")),
+    max_retries=int(os.getenv("ALERT_MAX_RETRIES", "5")),
+)
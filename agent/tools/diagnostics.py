@@ -0,0 +1,121 @@
+import time
+import typing as typ
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from tools.docker_client import docker_cache, redacted_env
+from tools.fleet import container_summary, format_duration
+from tools.log_tailer import log_tailers
+from tools.prober import prober
+from tools.stats_collector import stats_collectors
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="diagnose")
+
+
+def _health(container_name: str, url: str) -> dict:
+    return prober.probe(url)
+
+
+def _logs(container_name: str, url: str) -> dict:
+    tailer = log_tailers.get(container_name)
+    lines = tailer.recent(20, level="WARNING")
+    if not lines and tailer.error:
+        raise RuntimeError(tailer.error)
+    return {"lines": [line.text for line in lines]}
+
+
+def _state(container_name: str, url: str) -> dict:
+    return container_summary(docker_cache.get(container_name))
+
+
+def _resources(container_name: str, url: str) -> dict:
+    collector = stats_collectors.get(container_name)
+    summary = collector.summary(300)
+    if summary is None:
+        raise RuntimeError(collector.error or "no samples yet")
+    return summary
+
+
+def _config(container_name: str, url: str) -> dict:
+    return redacted_env(docker_cache.get(container_name))
+
+
+SECTIONS: typ.Dict[str, typ.Callable[[str, str], dict]] = {
+    "health": _health,
+    "logs": _logs,
+    "state": _state,
+    "resources": _resources,
+    "config": _config,
+}
+
+
+def diagnose(container_name: str, url: str, timeout: float = 15.0) -> dict:
+    """
+    Gather every section of ``SECTIONS`` concurrently.
+
+    Each section name maps to its result; sections that failed or did not
+    finish within ``timeout`` seconds are listed with the reason under
+    ``failures`` instead, so one slow or broken source never hides the
+    others. ``elapsed`` is the wall time of the whole report.
+    """
+    started = time.perf_counter()
+    futures = {name: _executor.submit(section, container_name, url) for name, section in SECTIONS.items()}
+    wait(futures.values(), timeout=timeout)
+    report, failures = {}, {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            failures[name] = f"timed out after {timeout:.0f}s"
+        elif future.exception() is not None:
+            failures[name] = str(future.exception())
+        else:
+            report[name] = future.result()
+    report["failures"] = failures
+    report["elapsed"] = time.perf_counter() - started
+    return report
+
+
+def format_report(container_name: str, report: dict) -> str:
+    """Render a diagnostics report as compact text for the agent."""
+    failures = report["failures"]
+    out = [f"Diagnostics for '{container_name}' (gathered in {report['elapsed']:.1f}s):"]
+
+    health = report.get("health")
+    if health is None:
+        out.append(f"Health: error: {failures['health']}")
+    elif health["healthy"]:
+        out.append(f"Health: {health['url']} healthy ({health['latency_ms']} ms)")
+    else:
+        out.append(f"Health: {health['url']} UNHEALTHY, status {health['status']}, {health.get('error') or health.get('body', '')} ({health['latency_ms']} ms)")
+
+    state = report.get("state")
+    if state is None:
+        out.append(f"State: error: {failures['state']}")
+    else:
+        parts = [state["state"], f"health={state['health']}" if state["health"] else None, f"restarts={state['restarts']}",
+                 f"up={format_duration(state['uptime'])}" if state["uptime"] is not None else None,
+                 f"exit_code={state['exit_code']}" if state["exit_code"] is not None else None]
+        out.append("State: " + " ".join(part for part in parts if part))
+
+    resources = report.get("resources")
+    if resources is None:
+        out.append(f"Resources: error: {failures['resources']}")
+    else:
+        cpu, memory = resources["cpu_percent"], resources["memory_percent"]
+        out.append(f"Resources (last {resources['span_seconds']:.0f}s): CPU avg {cpu['avg']:.1f}% p95 {cpu['p95']:.1f}% max {cpu['max']:.1f}%, "
+                   f"memory {resources['memory_bytes']['last'] / 2 ** 20:.1f} MiB ({memory['last']:.1f}% of limit)")
+
+    logs = report.get("logs")
+    if logs is None:
+        out.append(f"Recent warnings/errors: error: {failures['logs']}")
+    elif logs["lines"]:
+        out.append(f"Recent warnings/errors ({len(logs['lines'])} lines):")
+        out.extend(f"    {line}" for line in logs["lines"])
+    else:
+        out.append("Recent warnings/errors: none")
+
+    config = report.get("config")
+    if config is None:
+        out.append(f"Config: error: {failures['config']}")
+    else:
+        out.append("Config: " + ", ".join(f"{name}={value}" for name, value in sorted(config.items())))
+    return "\n".join(out)
@@ -0,0 +1,153 @@
+import re
+import threading
+import typing as typ
+from datetime import datetime, timezone
+
+import docker
+from docker.models.containers import Container
+
+
+def parse_timestamp(value: str) -> float:
+    """Unix time of a Docker RFC 3339 timestamp (UTC, nanoseconds; datetime only takes microseconds)."""
+    whole, _, fraction = value.rstrip("Z").partition(".")
+    parsed = datetime.fromisoformat(whole).replace(tzinfo=timezone.utc).timestamp()
+    return parsed + float(f"0.{fraction or 0}")
+
+
+# Environment variables whose values are never shown
+_SECRET_NAME = re.compile(r"SECRET|TOKEN|PASSWORD|PASSWD|API_KEY|PRIVATE|CREDENTIAL", re.IGNORECASE)
+# user:password@ in URL values, e.g. DATABASE_URL=postgresql://app:secret@db/app
+_URL_CREDENTIALS = re.compile(r"(\b[a-zA-Z][\w+.-]*://)[^/?#@\s]+@")
+
+
+def redacted_env(container: Container) -> typ.Dict[str, str]:
+    """A container's environment with secret-looking variables and URL credentials redacted."""
+    env = {}
+    for entry in container.attrs["Config"].get("Env") or ():
+        name, _, value = entry.partition("=")
+        env[name] = "<redacted>" if _SECRET_NAME.search(name) else _URL_CREDENTIALS.sub(r"\1<redacted>@", value)
+    return env
+
+
+# Events that never change a container's inspect data
+IGNORED_ACTIONS = ("exec_create", "exec_start", "exec_die", "attach", "resize", "top", "archive-path", "extract-to-dir")
+
+
+class ContainerCache:
+    """
+    Process-wide Docker client and cache of container handles.
+
+    ``get`` answers from memory after the first lookup of a container; a
+    background thread follows the Docker events stream and drops a
+    container's entry whenever it changes (start, die, health status,
+    rename, destroy...), so the next lookup re-inspects it. Entries are only
+    served while the events stream is connected; if it drops, the cache is
+    cleared and lookups go straight to the API until it reconnects.
+    """
+
+    def __init__(self, client_factory: typ.Callable[[], docker.DockerClient] = docker.from_env, reconnect_delay: float = 1.0):
+        self._client_factory = client_factory
+        self._client: typ.Optional[docker.DockerClient] = None
+        self.reconnect_delay = reconnect_delay
+        self._containers: typ.Dict[str, Container] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._listening = False
+        self._listener: typ.Optional[threading.Thread] = None
+        self._events = None
+        self._stopped = threading.Event()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def client(self) -> docker.DockerClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._client_factory()
+        return self._client
+
+    def get(self, name: str) -> Container:
+        """
+        Return the container ``name`` (a name or id), from the cache when possible.
+
+        Raises ``docker.errors.NotFound`` like ``client.containers.get``.
+        """
+        self._ensure_listener()
+        with self._lock:
+            container = self._containers.get(name) if self._listening else None
+            generation = self._generation
+        if container is not None:
+            self.hits += 1
+            return container
+        self.misses += 1
+        container = self.client.containers.get(name)
+        with self._lock:
+            # An event arrived while we were inspecting: the result may already be stale
+            if self._listening and generation == self._generation:
+                self._containers[name] = container
+        return container
+
+    def invalidate(self, container_id: typ.Optional[str] = None, name: typ.Optional[str] = None):
+        """Drop cached entries for a container; with no arguments, drop everything."""
+        with self._lock:
+            self._generation += 1
+            if container_id is None and name is None:
+                self._containers.clear()
+                return
+            for key, container in list(self._containers.items()):
+                if key in (container_id, name) or container.id == container_id or container.name == name:
+                    del self._containers[key]
+
+    def _ensure_listener(self):
+        if self._listener is not None or self._stopped.is_set():
+            return
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="docker-events", daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while not self._stopped.is_set():
+            try:
+                self._events = self.client.events(decode=True, filters={"type": "container"})
+                # Anything cached before the stream was connected may have missed events
+                self.invalidate()
+                with self._lock:
+                    self._listening = True
+                for event in self._events:
+                    if event.get("Action", "").split(":")[0] in IGNORED_ACTIONS:
+                        continue
+                    actor = event.get("Actor", {})
+                    self.invalidate(actor.get("ID"), actor.get("Attributes", {}).get("name"))
+            except Exception:
+                pass
+            with self._lock:
+                self._listening = False
+                self._containers.clear()
+            self._stopped.wait(self.reconnect_delay)
+
+    def close(self):
+        self._stopped.set()
+        if self._events is not None:
+            self._events.close()
+        if self._client is not None:
+            self._client.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._containers)
+        return {"hits": self.hits, "misses": self.misses, "size": size, "listening": self._listening}
+
+
+docker_cache = ContainerCache()
+
+
+def get_client() -> docker.DockerClient:
+    """Shared Docker client; one connection pool for every tool."""
+    return docker_cache.client
+
+
+def get_container(name: str) -> Container:
+    """Cached container handle; see ``ContainerCache.get``."""
+    return docker_cache.get(name)
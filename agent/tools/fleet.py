@@ -0,0 +1,187 @@
+import re
+import threading
+import time
+import typing as typ
+
+import docker
+
+from tools.docker_client import docker_cache, parse_timestamp
+
+COMPOSE_PROJECT_LABEL = "com.docker.compose.project"
+# Fields compared between snapshots; uptime changes on every call and is left out
+TRACKED_FIELDS = ("state", "health", "restarts", "exit_code")
+# Containers started this recently, or not running, get their restart count inspected
+RECENT_START = 600.0
+
+_STATUS_UP = re.compile(r"^Up (.+?)(?: \(|$)")
+_STATUS_EXIT_CODE = re.compile(r"^(?:Exited|Restarting) \((-?\d+)\)")
+_STATUS_HEALTH = re.compile(r"\((healthy|unhealthy|health: starting)\)")
+_DURATION_UNITS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400, "month": 30 * 86400, "year": 365 * 86400}
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return f"{days}d{hours}h"
+    if hours:
+        return f"{hours}h{minutes}m"
+    return f"{minutes}m{seconds}s" if minutes else f"{seconds}s"
+
+
+def container_summary(container, now: typ.Optional[float] = None) -> dict:
+    """Compact state of a container from its inspect data."""
+    state = container.attrs.get("State") or {}
+    started = state.get("StartedAt") or ""
+    running = state.get("Running", False)
+    summary = {
+        "state": state.get("Status", container.status),
+        "health": (state.get("Health") or {}).get("Status"),
+        "restarts": container.attrs.get("RestartCount", 0),
+        "exit_code": None if running else state.get("ExitCode"),
+        "uptime": None,
+    }
+    if running and started and not started.startswith("0001-"):
+        summary["uptime"] = max(0.0, (now or time.time()) - parse_timestamp(started))
+    return summary
+
+
+def parse_human_duration(text: str) -> typ.Optional[float]:
+    """Seconds in a Docker status duration ("5 minutes", "About an hour", "Less than a second")."""
+    text = text.lower()
+    if text.startswith("less than"):
+        return 0.0
+    count, _, unit = re.sub(r"^about an? ", "1 ", text).partition(" ")
+    try:
+        return float(count) * _DURATION_UNITS[unit.rstrip("s")]
+    except (ValueError, KeyError):
+        return None
+
+
+def listed_summary(attrs: dict) -> dict:
+    """
+    Compact state of a container from its ``containers.list`` entry.
+
+    Health, exit code and uptime are parsed from the human-readable
+    ``Status`` ("Up 5 minutes (healthy)", "Exited (137) 2 hours ago"), so
+    uptime is only as precise as Docker's wording. The list does not carry
+    the restart count; ``restarts`` is left as ``None``.
+    """
+    status = attrs.get("Status") or ""
+    health = _STATUS_HEALTH.search(status)
+    exit_code = _STATUS_EXIT_CODE.match(status)
+    up = _STATUS_UP.match(status)
+    return {
+        "state": attrs.get("State") or status.split(" ", 1)[0].lower(),
+        "health": health.group(1).replace("health: ", "") if health else None,
+        "restarts": None,
+        "exit_code": int(exit_code.group(1)) if exit_code else None,
+        "uptime": parse_human_duration(up.group(1)) if up else None,
+    }
+
+
+def _needs_restart_count(summary: dict, before: typ.Optional[dict], since: typ.Optional[float]) -> bool:
+    if summary["state"] != "running" or summary["uptime"] is None:
+        return True
+    if before is None or before["restarts"] is None:
+        return summary["uptime"] < RECENT_START
+    # Started again since the previous snapshot
+    return before["state"] != "running" or since is None or summary["uptime"] < since
+
+
+class FleetSnapshots:
+    """
+    Status of every container from one ``containers.list`` call.
+
+    The list request is sparse and state, health, exit code and uptime come
+    from its payload. Only the restart count needs an inspect, and it is only
+    fetched for containers that are not running or have started recently or
+    since the previous snapshot; a long-running container keeps the count from
+    the previous snapshot, or ``None`` if it was never inspected. The previous
+    snapshot is kept per filter so each call can report what changed in between.
+    """
+
+    def __init__(self):
+        self._previous: typ.Dict[tuple, typ.Tuple[float, typ.Dict[str, dict]]] = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self, label: typ.Optional[str] = None, project: typ.Optional[str] = None) -> typ.Tuple[typ.Dict[str, dict], typ.Optional[dict]]:
+        """
+        Current state of the matching containers and the diff from the previous call.
+
+        The diff is ``None`` on the first call for a filter, otherwise a dict
+        with ``added``, ``removed``, ``changed`` (name -> {field: (old, new)})
+        and ``since`` (seconds since the previous snapshot).
+        """
+        labels = [label] if label else []
+        if project:
+            labels.append(f"{COMPOSE_PROJECT_LABEL}={project}")
+        filters = {"label": labels} if labels else None
+        key = (label, project)
+        with self._lock:
+            previous = self._previous.get(key)
+        taken_at, before = previous or (None, {})
+        now = time.time()
+        since = None if taken_at is None else now - taken_at
+        current = {}
+        for listed in docker_cache.client.containers.list(all=True, sparse=True, filters=filters):
+            name = listed.attrs["Names"][0].lstrip("/")
+            summary = listed_summary(listed.attrs)
+            if _needs_restart_count(summary, before.get(name), since):
+                try:
+                    summary["restarts"] = docker_cache.get(listed.id).attrs.get("RestartCount", 0)
+                except docker.errors.NotFound:
+                    # Removed between the list and the inspect
+                    continue
+            elif name in before:
+                summary["restarts"] = before[name]["restarts"]
+            current[name] = summary
+
+        with self._lock:
+            self._previous[key] = (now, current)
+        if previous is None:
+            return current, None
+        changed = {}
+        for name in current.keys() & before.keys():
+            fields = {field: (before[name][field], current[name][field]) for field in TRACKED_FIELDS if before[name][field] != current[name][field]}
+            if None in fields.get("restarts", ()):
+                # Only one side was inspected, so the count is unknown rather than changed
+                del fields["restarts"]
+            if fields:
+                changed[name] = fields
+        diff = {
+            "added": sorted(current.keys() - before.keys()),
+            "removed": sorted(before.keys() - current.keys()),
+            "changed": changed,
+            "since": since,
+        }
+        return current, diff
+
+
+def format_snapshot(current: typ.Dict[str, dict], diff: typ.Optional[dict]) -> str:
+    """One line per container, followed by the changes since the previous snapshot."""
+    if not current:
+        lines = ["No containers match."]
+    else:
+        lines = []
+        for name, summary in sorted(current.items()):
+            parts = [name, summary["state"]]
+            if summary["health"]:
+                parts.append(summary["health"])
+            if summary["restarts"] is not None:
+                parts.append(f"restarts={summary['restarts']}")
+            if summary["uptime"] is not None:
+                parts.append(f"up={format_duration(summary['uptime'])}")
+            if summary["exit_code"] is not None:
+                parts.append(f"exit_code={summary['exit_code']}")
+            lines.append(" ".join(parts))
+    if diff is None:
+        return "\n".join(lines)
+    changes = [f"{name}: " + ", ".join(f"{field} {old} -> {new}" for field, (old, new) in fields.items()) for name, fields in sorted(diff["changed"].items())]
+    changes += [f"{name}: new" for name in diff["added"]] + [f"{name}: gone" for name in diff["removed"]]
+    lines.append(f"Changes since the previous snapshot ({format_duration(diff['since'])} ago): " + ("; ".join(changes) if changes else "none"))
+    return "\n".join(lines)
+
+
+fleet_snapshots = FleetSnapshots()
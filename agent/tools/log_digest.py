@@ -0,0 +1,292 @@
+import itertools
+import json
+import math
+import re
+import threading
+import typing as typ
+from collections import deque
+
+from tools.log_tailer import LogLine, line_level
+
+WILDCARD = "<*>"
+LEVEL_WEIGHTS = {"CRITICAL": 5, "ERROR": 4, "WARNING": 2, "INFO": 0, "DEBUG": 0}
+
+# Variable parts masked before clustering, most specific first
+_MASKS = [
+    re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"),
+    re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"),
+    re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"),
+    re.compile(r"\b0x[0-9a-fA-F]+\b|\b(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{8,}\b"),
+    re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])"),
+]
+# Kept verbatim and part of the tree key, so a 500 never merges into the template of a 200
+_LITERALS = re.compile(r'\bstatus[=:]\s*[1-5]\d{2}\b|(?<=HTTP/\d\.\d" )[1-5]\d{2}\b', re.IGNORECASE)
+# Keys of a JSON log line that are not rendered as ``key=value`` fields
+_JSON_META = ("ts", "level", "logger", "message", "exc_info")
+_TRACEBACK_START = "Traceback (most recent call last):"
+_FRAME = re.compile(r'^\s+File "([^"]+)", line \d+, in (\S+)')
+
+
+def mask(line: str) -> typ.List[str]:
+    """Tokens of ``line`` with timestamps, ids, addresses and numbers replaced by ``<*>``; status codes are kept."""
+    masked = []
+    for piece, literal in itertools.zip_longest(_LITERALS.split(line), _LITERALS.findall(line), fillvalue=""):
+        for pattern in _MASKS:
+            piece = pattern.sub(WILDCARD, piece)
+        masked.append(piece + literal)
+    return "".join(masked).split()
+
+
+def parse_json_line(line: LogLine) -> typ.Optional[typ.Tuple[LogLine, typ.List[LogLine]]]:
+    """
+    Split a JSON log line (one object per line, as the app logs) into a plain line and its traceback.
+
+    The plain line is ``logger: message key=value...`` without the timestamp;
+    the traceback lines come from ``exc_info`` and are empty when it is
+    absent. Returns ``None`` for anything that is not a JSON object.
+    """
+    text = line.text.strip()
+    if not text.startswith("{"):
+        return None
+    try:
+        record = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    level = line_level(str(record.get("level", ""))) or line.level
+    parts = [f"{record['logger']}:"] if record.get("logger") else []
+    parts.append(str(record.get("message", "")))
+    parts.extend(f"{key}={value}" for key, value in record.items() if key not in _JSON_META)
+    plain = LogLine(line.seq, line.timestamp, level, " ".join(parts))
+    trace = [LogLine(line.seq, line.timestamp, level, trace_line) for trace_line in str(record.get("exc_info") or "").splitlines()]
+    return plain, trace
+
+
+class LogCluster:
+    """One log template and the lines it matched."""
+
+    def __init__(self, cluster_id: int, tokens: typ.List[str], samples: int):
+        self.id = cluster_id
+        self.tokens = tokens
+        self.count = 0
+        self.level: typ.Optional[str] = None
+        self.first_seen: typ.Optional[str] = None
+        self.last_seen: typ.Optional[str] = None
+        self.samples: typ.Deque[str] = deque(maxlen=samples)
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+    def add(self, line: LogLine):
+        self.count += 1
+        self.level = line.level or self.level
+        self.first_seen = self.first_seen or line.timestamp
+        self.last_seen = line.timestamp
+        self.samples.append(line.text)
+
+
+class Drain:
+    """
+    Online log template miner (He et al., "Drain", ICWS 2017).
+
+    Lines are routed through a fixed-depth tree keyed on their token count and
+    first ``depth`` tokens, then compared against the few templates in that
+    leaf; a line joins the most similar template when at least
+    ``similarity`` of its tokens match, and differing tokens become ``<*>``.
+    Each line costs one dict lookup and a scan of a short leaf, so mining
+    stays linear in the number of lines. Templates persist across calls.
+    """
+
+    def __init__(self, depth: int = 2, similarity: float = 0.5, max_children: int = 100, samples: int = 5):
+        self.depth = depth
+        self.similarity = similarity
+        self.max_children = max_children
+        self.samples = samples
+        self._leaves: typ.Dict[tuple, typ.List[LogCluster]] = {}
+        self.clusters: typ.Dict[int, LogCluster] = {}
+        self._ids = itertools.count(1)
+
+    def _leaf_key(self, tokens: typ.List[str]) -> tuple:
+        prefix = []
+        for token in tokens[:self.depth]:
+            prefix.append(WILDCARD if any(c.isdigit() for c in token) else token)
+        return (len(tokens), *prefix)
+
+    @staticmethod
+    def _score(template: typ.List[str], tokens: typ.List[str]) -> typ.Tuple[float, int]:
+        same = wildcards = 0
+        for left, right in zip(template, tokens):
+            if left == WILDCARD:
+                wildcards += 1
+            elif left == right:
+                same += 1
+        return same / len(tokens), wildcards
+
+    def add(self, line: LogLine) -> typ.Tuple[LogCluster, bool]:
+        """Cluster ``line``; returns its cluster and whether the cluster is new."""
+        tokens = mask(line.text)
+        key = self._leaf_key(tokens) + tuple(literal.lower() for literal in _LITERALS.findall(line.text))
+        leaf = self._leaves.setdefault(key, [])
+        best, best_score = None, (-1.0, -1)
+        for cluster in leaf:
+            score = self._score(cluster.tokens, tokens)
+            if score > best_score:
+                best, best_score = cluster, score
+        created = best is None or best_score[0] < self.similarity
+        if created:
+            if len(leaf) >= self.max_children:
+                # Make room first: the new template has no lines yet and would
+                # otherwise be the least used one, evicted as soon as it is made
+                evicted = min(leaf, key=lambda cluster: cluster.count)
+                leaf.remove(evicted)
+                del self.clusters[evicted.id]
+            best = LogCluster(next(self._ids), tokens, self.samples)
+            self.clusters[best.id] = best
+            leaf.append(best)
+        else:
+            best.tokens = [left if left == right else WILDCARD for left, right in zip(best.tokens, tokens)]
+        best.add(line)
+        return best, created
+
+
+def split_tracebacks(lines: typ.Iterable[LogLine]) -> typ.Tuple[typ.List[LogLine], typ.List[typ.List[LogLine]]]:
+    """
+    Separate Python tracebacks (header to exception line) from ordinary lines.
+
+    JSON lines are parsed first: their ``exc_info`` is a traceback of its own,
+    and any JSON line ends a plain-text traceback in progress.
+    """
+    plain, traces, current = [], [], None
+    for line in lines:
+        parsed = parse_json_line(line)
+        if parsed is not None:
+            if current:
+                traces.append(current)
+                current = None
+            plain.append(parsed[0])
+            if parsed[1]:
+                traces.append(parsed[1])
+            continue
+        text = line.text.rstrip()
+        if _TRACEBACK_START in text:
+            if current:
+                traces.append(current)
+            current = [line]
+        elif current is not None:
+            current.append(line)
+            # The exception line is the first unindented line after the frames
+            if text and not text[0].isspace() and len(current) > 2 and not text.startswith(("During handling", "The above exception")):
+                traces.append(current)
+                current = None
+        elif text:
+            plain.append(line)
+    if current:
+        traces.append(current)
+    return plain, traces
+
+
+def trace_signature(trace: typ.List[LogLine]) -> typ.Tuple[str, str]:
+    """``(exception, innermost frame)`` identifying a traceback regardless of its values."""
+    frames = [match.groups() for match in (_FRAME.match(line.text) for line in trace) if match]
+    location = f"{frames[-1][0]}:{frames[-1][1]}" if frames else "?"
+    last = trace[-1].text.strip()
+    exception = last.split(":", 1)[0] if ":" in last else last
+    return exception, location
+
+
+class LogDigester:
+    """
+    Turns raw log lines into a short, ranked digest.
+
+    Tracebacks are pulled out and grouped by exception and innermost frame;
+    the remaining lines are mined into templates by ``Drain``. Templates are
+    ranked by level, novelty (first seen in this digest) and rarity, so a new
+    error shows up first and a thousand identical access lines collapse to one
+    line with a count. Sample raw lines are kept per template for follow-up.
+    """
+
+    def __init__(self, **drain_options):
+        self.drain = Drain(**drain_options)
+        self._lock = threading.Lock()
+
+    def digest(self, lines: typ.Sequence[LogLine], top: int = 15) -> dict:
+        plain, traces = split_tracebacks(lines)
+        with self._lock:
+            seen, created = {}, set()
+            for line in plain:
+                cluster, new = self.drain.add(line)
+                seen[cluster.id] = seen.get(cluster.id, 0) + 1
+                if new:
+                    created.add(cluster.id)
+            templates = []
+            for cluster_id, count in seen.items():
+                cluster = self.drain.clusters.get(cluster_id)
+                if cluster is None:
+                    continue
+                weight = LEVEL_WEIGHTS.get(cluster.level or "", 1)
+                score = weight + 3 * (cluster_id in created) + 2 / (1 + math.log10(count))
+                templates.append({
+                    "id": cluster_id,
+                    "template": cluster.template,
+                    "count": count,
+                    "level": cluster.level,
+                    "new": cluster_id in created,
+                    "last_seen": cluster.last_seen,
+                    "score": round(score, 2),
+                })
+
+        grouped: typ.Dict[typ.Tuple[str, str], dict] = {}
+        for trace in traces:
+            signature = trace_signature(trace)
+            entry = grouped.setdefault(signature, {"exception": signature[0], "location": signature[1], "count": 0})
+            entry["count"] += 1
+            entry["last_seen"] = trace[-1].timestamp
+            entry["example"] = "\n".join(line.text for line in trace[-6:])
+
+        templates.sort(key=lambda entry: (-entry["score"], -entry["count"]))
+        return {
+            "lines": len(lines),
+            "chars": sum(len(line.text) + 1 for line in lines),
+            "templates": templates[:top],
+            "omitted": {"templates": max(0, len(templates) - top), "lines": sum(entry["count"] for entry in templates[top:])},
+            "tracebacks": sorted(grouped.values(), key=lambda entry: -entry["count"]),
+        }
+
+    def samples(self, cluster_id: int) -> typ.Optional[typ.List[str]]:
+        with self._lock:
+            cluster = self.drain.clusters.get(cluster_id)
+            return list(cluster.samples) if cluster is not None else None
+
+
+def format_digest(digest: dict) -> str:
+    """Render a digest as compact text for the agent."""
+    if not digest["lines"]:
+        return "No new log lines."
+    out = [f"{digest['lines']} log lines ({digest['chars']} chars) -> {len(digest['templates'])} templates, {len(digest['tracebacks'])} distinct tracebacks."]
+    for trace in digest["tracebacks"]:
+        out.append(f"TRACEBACK x{trace['count']} {trace['exception']} at {trace['location']} (last {trace['last_seen']})")
+        out.extend(f"    {line}" for line in trace["example"].splitlines())
+    for entry in digest["templates"]:
+        flags = " NEW" if entry["new"] else ""
+        out.append(f"[#{entry['id']} {entry['level'] or '-'} x{entry['count']}{flags}] {entry['template']}")
+    omitted = digest["omitted"]
+    if omitted["templates"]:
+        out.append(f"... {omitted['templates']} lower-ranked templates ({omitted['lines']} lines) omitted.")
+    return "\n".join(out)
+
+
+class LogDigesters:
+    """One ``LogDigester`` per container, so template ids stay stable between calls."""
+
+    def __init__(self):
+        self._digesters: typ.Dict[str, LogDigester] = {}
+        self._lock = threading.Lock()
+
+    def get(self, container_name: str) -> LogDigester:
+        with self._lock:
+            return self._digesters.setdefault(container_name, LogDigester())
+
+
+log_digesters = LogDigesters()
@@ -0,0 +1,207 @@
+import itertools
+import re
+import threading
+import time
+import typing as typ
+from collections import deque
+
+import docker
+
+from tools.docker_client import get_container, parse_timestamp
+
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+_LEVEL_ALIASES = {"WARN": "WARNING", "FATAL": "CRITICAL"}
+_LEVEL_PATTERN = re.compile(r"\b(DEBUG|INFO|WARN(?:ING)?|ERROR|CRITICAL|FATAL)\b", re.IGNORECASE)
+# The backfill is complete once no line has arrived for this long
+BACKFILL_SETTLE = 0.1
+
+
+def line_level(line: str) -> typ.Optional[str]:
+    """Level named in a log line, or ``None`` when it names none."""
+    match = _LEVEL_PATTERN.search(line)
+    if match is None:
+        return None
+    level = match.group(1).upper()
+    return _LEVEL_ALIASES.get(level, level)
+
+
+def _timestamp_key(value: str) -> str:
+    # Fractions may have trailing zeros trimmed; pad them so keys compare as strings
+    whole, _, fraction = value.rstrip("Z").partition(".")
+    return f"{whole}.{fraction:0<9}"
+
+
+class LogLine(typ.NamedTuple):
+    seq: int
+    timestamp: str
+    level: typ.Optional[str]
+    text: str
+
+
+class LogTailer:
+    """
+    Follows one container's log stream into a bounded ring buffer.
+
+    A daemon thread keeps a ``follow`` stream open, so reading logs never goes
+    back to the Docker API; the first stream also carries the last
+    ``backfill`` lines, so there is no gap between history and live lines.
+    Each line gets a sequence number, and every consumer keeps its own cursor
+    so ``read_new`` returns only lines it has not seen. When the stream ends
+    (the container stopped or restarted) it is reopened with ``since`` set to
+    the last timestamp received; lines up to that timestamp are skipped, so
+    nothing is fetched twice and lines sharing it are not lost. Lines without a level inherit the previous line's, which
+    keeps traceback bodies with their ``ERROR`` line under level filters.
+    """
+
+    def __init__(self, container_name: str, capacity: int = 5000, backfill: int = 100, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self.container_name = container_name
+        self.backfill = backfill
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._lines: typ.Deque[LogLine] = deque(maxlen=capacity)
+        self._seq = itertools.count(1)
+        self._cursors: typ.Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._since: typ.Optional[str] = None
+        self._resume_after: typ.Optional[str] = None
+        self._last_level: typ.Optional[str] = None
+        self._stream = None
+        self._stopped = threading.Event()
+        self._connected = threading.Event()
+        self._ready = threading.Event()
+        self.error: typ.Optional[str] = None
+        self._thread = threading.Thread(target=self._follow, name=f"logs-{container_name}", daemon=True)
+
+    def start(self, wait: float = 5.0):
+        """Start following; waits up to ``wait`` seconds for the backfill to be buffered."""
+        deadline = time.monotonic() + wait
+        self._thread.start()
+        self._connected.wait(wait)
+        # The backfill arrives on the stream: done at ``backfill`` lines or once it goes quiet
+        received = -1
+        while not self._ready.is_set() and received != len(self._lines) and time.monotonic() < deadline:
+            received = len(self._lines)
+            self._ready.wait(BACKFILL_SETTLE)
+
+    def _follow(self):
+        delay = self.reconnect_delay
+        while not self._stopped.is_set():
+            try:
+                container = get_container(self.container_name)
+                if self._since is None:
+                    self._stream = container.logs(stream=True, follow=True, timestamps=True, tail=self.backfill)
+                else:
+                    self._resume_after = self._since
+                    self._stream = container.logs(stream=True, follow=True, timestamps=True, since=parse_timestamp(self._since))
+                self.error = None
+                self._connected.set()
+                delay = self.reconnect_delay
+                # tty containers stream one byte per chunk: collect the pieces and
+                # only join, split and take the lock once a line is complete
+                pending: typ.List[bytes] = []
+                for chunk in self._stream:
+                    pending.append(chunk)
+                    if b"\n" in chunk:
+                        *complete, rest = b"".join(pending).split(b"\n")
+                        pending = [rest]
+                        self._append(complete)
+                self._append([b"".join(pending)])
+            except docker.errors.NotFound:
+                self.error = f"Container '{self.container_name}' not found."
+            except Exception as e:
+                self.error = str(e)
+            self._connected.set()
+            self._ready.set()
+            self._stopped.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _append(self, raw_lines: typ.List[bytes]):
+        with self._lock:
+            for raw in raw_lines:
+                if not raw:
+                    continue
+                timestamp, _, text = raw.decode("utf-8", errors="replace").rstrip("\r").partition(" ")
+                # Reopening with ``since`` repeats lines up to the boundary timestamp
+                if self._resume_after is not None:
+                    if _timestamp_key(timestamp) <= _timestamp_key(self._resume_after):
+                        continue
+                    self._resume_after = None
+                self._since = timestamp
+                level = line_level(text)
+                if level is None:
+                    level = self._last_level
+                else:
+                    self._last_level = level
+                self._lines.append(LogLine(next(self._seq), timestamp, level, text))
+            if len(self._lines) >= self.backfill:
+                self._ready.set()
+
+    @staticmethod
+    def _filter(lines: typ.Iterable[LogLine], level: typ.Optional[str], pattern: typ.Optional[typ.Pattern]) -> typ.List[LogLine]:
+        if level:
+            level = _LEVEL_ALIASES.get(level.upper(), level.upper())
+            minimum = LEVELS.index(level) if level in LEVELS else 0
+            lines = [line for line in lines if line.level is not None and LEVELS.index(line.level) >= minimum]
+        if pattern:
+            lines = [line for line in lines if pattern.search(line.text)]
+        return list(lines)
+
+    def read_new(self, consumer: str = "agent", level: typ.Optional[str] = None, pattern: typ.Optional[str] = None, limit: typ.Optional[int] = 200) -> typ.Tuple[typ.List[LogLine], int]:
+        """
+        Lines appended since ``consumer`` last read, then advance its cursor.
+
+        Returns the matching lines (the last ``limit`` of them, or all when
+        ``limit`` is ``None``) and how many unread lines were overwritten in
+        the ring buffer before this read. Raises ``re.error`` for an invalid
+        ``pattern``, before the cursor moves.
+        """
+        regex = re.compile(pattern) if pattern else None
+        with self._lock:
+            cursor = self._cursors.get(consumer, 0)
+            lines = [line for line in self._lines if line.seq > cursor]
+            oldest = self._lines[0].seq if self._lines else cursor + 1
+            if self._lines:
+                self._cursors[consumer] = self._lines[-1].seq
+        missed = max(0, oldest - cursor - 1)
+        lines = self._filter(lines, level, regex)
+        return (lines[-limit:] if limit else lines), missed
+
+    def recent(self, count: int = 100, level: typ.Optional[str] = None, pattern: typ.Optional[str] = None) -> typ.List[LogLine]:
+        """The last ``count`` matching lines, regardless of cursors; raises ``re.error`` for an invalid ``pattern``."""
+        regex = re.compile(pattern) if pattern else None
+        with self._lock:
+            lines = list(self._lines)
+        return self._filter(lines, level, regex)[-count:]
+
+    def close(self):
+        self._stopped.set()
+        if self._stream is not None:
+            self._stream.close()
+
+
+class LogTailers:
+    """One ``LogTailer`` per container, started on first use."""
+
+    def __init__(self, **tailer_options):
+        self.tailer_options = tailer_options
+        self._tailers: typ.Dict[str, LogTailer] = {}
+        self._lock = threading.Lock()
+
+    def get(self, container_name: str) -> LogTailer:
+        with self._lock:
+            tailer = self._tailers.get(container_name)
+            started = tailer is None
+            if started:
+                tailer = self._tailers[container_name] = LogTailer(container_name, **self.tailer_options)
+        if started:
+            tailer.start()
+        return tailer
+
+    def close(self):
+        with self._lock:
+            tailers, self._tailers = list(self._tailers.values()), {}
+        for tailer in tailers:
+            tailer.close()
+
+
+log_tailers = LogTailers()
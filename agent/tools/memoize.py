@@ -0,0 +1,103 @@
+import inspect
+import threading
+import time
+import typing as typ
+from collections import defaultdict
+
+from smolagents import Tool
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def _cacheable(result) -> bool:
+    # Tools report failures and missing data as strings ("Error ...", "... not found.",
+    # "... yet."); those are transient and should not stick for a whole TTL
+    if not isinstance(result, str):
+        return True
+    return not (result.startswith("Error") or result.rstrip(".").endswith(("not found", "yet")))
+
+
+class ToolCache:
+    """
+    TTL cache in front of smolagents tools.
+
+    ``wrap`` replaces a tool instance's ``forward`` (works for ``@tool``
+    functions and ``Tool`` subclasses alike) with one that keys results on
+    the tool name and its bound arguments, defaults filled in, so ``f("x")``
+    and ``f(container_name="x")`` share an entry. Each tool has its own TTL.
+    ``invalidate`` drops entries by tool and/or argument value, e.g. every
+    entry for a container that was just restarted. Error and "not found"
+    results are not cached, and expired entries are purged on insert.
+    """
+
+    def __init__(self, cacheable: typ.Callable[[typ.Any], bool] = _cacheable):
+        self.cacheable = cacheable
+        self._entries: typ.Dict[tuple, typ.Tuple[float, typ.Any]] = {}
+        self._lock = threading.Lock()
+        self.hits: typ.Dict[str, int] = defaultdict(int)
+        self.misses: typ.Dict[str, int] = defaultdict(int)
+
+    def wrap(self, tool: Tool, ttl: float) -> Tool:
+        """Cache ``tool``'s results for ``ttl`` seconds; wrapping twice only updates the TTL."""
+        forward = getattr(tool, "_uncached_forward", None) or tool.forward
+        signature = inspect.signature(forward)
+        # ``@tool`` gives the plain function a signature that still lists ``self``
+        signature = signature.replace(parameters=[param for param in signature.parameters.values() if param.name != "self"])
+        name = tool.name
+
+        def cached_forward(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (name, tuple(sorted((arg, _freeze(value)) for arg, value in bound.arguments.items())))
+            now = time.monotonic()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self.hits[name] += 1
+                    return entry[1]
+                self.misses[name] += 1
+            result = forward(*args, **kwargs)
+            if self.cacheable(result):
+                now = time.monotonic()
+                with self._lock:
+                    self._purge(now)
+                    self._entries[key] = (now + ttl, result)
+            return result
+
+        tool._uncached_forward = forward
+        tool.forward = cached_forward
+        return tool
+
+    def _purge(self, now: float):
+        # Caller must hold self._lock
+        for key in [key for key, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+
+    def wrap_all(self, tools: typ.Iterable[Tool], ttls: typ.Dict[str, float]) -> typ.List[Tool]:
+        """Wrap the tools named in ``ttls``; the others are returned unchanged."""
+        return [self.wrap(tool, ttls[tool.name]) if tool.name in ttls else tool for tool in tools]
+
+    def invalidate(self, tool_name: typ.Optional[str] = None, **arguments):
+        """Drop entries of ``tool_name`` (or every tool) whose arguments include all of ``arguments``."""
+        with self._lock:
+            for key in list(self._entries):
+                name, bound = key
+                if tool_name is not None and name != tool_name:
+                    continue
+                values = dict(bound)
+                if all(arg in values and values[arg] == _freeze(value) for arg, value in arguments.items()):
+                    del self._entries[key]
+
+    def stats(self) -> typ.Dict[str, dict]:
+        with self._lock:
+            names = set(self.hits) | set(self.misses)
+            return {name: {"hits": self.hits[name], "misses": self.misses[name]} for name in sorted(names)}
+
+
+tool_cache = ToolCache()
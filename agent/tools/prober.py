@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+import typing as typ
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+HEALTH_PATH = "/health_check"
+# Bytes of the response body kept in a probe result
+MAX_BODY = 200
+
+
+class Prober:
+    """
+    HTTP health prober with connection reuse and strict timeouts.
+
+    All probes share one ``requests.Session`` whose adapter keeps up to
+    ``pool_size`` keep-alive connections per host, so repeated probes skip the
+    TCP (and TLS) handshake. ``connect_timeout`` bounds the connect and
+    ``read_timeout`` each wait for the response headers; only the first
+    ``MAX_BODY`` bytes of the body are read, within what is left of
+    ``connect_timeout + read_timeout``, so a hung, trickling or huge response
+    costs about that sum instead of blocking the agent. The latency of each
+    probe is kept per URL.
+    """
+
+    def __init__(self, connect_timeout: float = 2.0, read_timeout: float = 5.0, pool_size: int = 16, history: int = 50):
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="prober")
+        self._latencies: typ.Dict[str, typ.Deque[float]] = defaultdict(lambda: deque(maxlen=history))
+        self._lock = threading.Lock()
+
+    def probe(self, url: str, path: str = HEALTH_PATH) -> dict:
+        """
+        Probe ``url + path`` once.
+
+        Returns a dict with ``url``, ``healthy``, ``status`` (``None`` when no
+        response arrived), ``latency_ms``, and ``error`` or the response ``body``
+        (truncated).
+        """
+        target = url.rstrip("/") + path
+        started = time.perf_counter()
+        result = {"url": url, "healthy": False, "status": None}
+        try:
+            with self.session.get(target, timeout=self.timeout, stream=True) as response:
+                result["status"] = response.status_code
+                result["healthy"] = response.status_code == 200
+                body = self._read_body(response, started + sum(self.timeout))
+                result["body"] = body.decode(response.encoding or "utf-8", errors="replace")
+                if response.raw.closed:
+                    # Read to the end: the connection can go back to the pool
+                    response.raw.release_conn()
+        except requests.exceptions.Timeout as e:
+            result["error"] = f"timeout: {e}"
+        except requests.exceptions.RequestException as e:
+            result["error"] = str(e)
+        latency = time.perf_counter() - started
+        result["latency_ms"] = round(latency * 1000, 1)
+        with self._lock:
+            self._latencies[url].append(latency)
+        return result
+
+    @staticmethod
+    def _read_body(response: requests.Response, deadline: float) -> bytes:
+        # One socket read at a time, each bounded by the time left, so a server
+        # trickling bytes cannot stretch the probe past the deadline.
+        body = b""
+        sock = getattr(response.raw.connection, "sock", None)
+        while len(body) < MAX_BODY:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            if sock is not None:
+                sock.settimeout(remaining)
+            try:
+                chunk = response.raw.read1(MAX_BODY - len(body)) if hasattr(response.raw, "read1") else response.raw.read(MAX_BODY - len(body))
+            except (OSError, urllib3.exceptions.HTTPError):
+                break
+            if not chunk:
+                break
+            body += chunk
+        return body[:MAX_BODY]
+
+    def probe_many(self, urls: typ.Iterable[str], path: str = HEALTH_PATH) -> typ.List[dict]:
+        """Probe every URL concurrently; takes about as long as the slowest one."""
+        return list(self._executor.map(lambda url: self.probe(url, path), urls))
+
+    def latency_summary(self, url: str) -> typ.Optional[dict]:
+        """Min, median and max latency in ms over the recent probes of ``url``."""
+        with self._lock:
+            samples = sorted(self._latencies.get(url, ()))
+        if not samples:
+            return None
+        return {
+            "count": len(samples),
+            "min_ms": round(samples[0] * 1000, 1),
+            "p50_ms": round(samples[len(samples) // 2] * 1000, 1),
+            "max_ms": round(samples[-1] * 1000, 1),
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+prober = Prober(
+    connect_timeout=float(os.getenv("PROBE_CONNECT_TIMEOUT", "2")),
+    read_timeout=float(os.getenv("PROBE_READ_TIMEOUT", "5")),
+)
@@ -0,0 +1,174 @@
+import os
+import re
+import threading
+import time
+import typing as typ
+from collections import defaultdict, deque
+
+from tools.docker_client import docker_cache
+from tools.log_tailer import log_tailers
+from tools.prober import prober
+
+READINESS_CHECKS = ("health", "docker", "log", "running")
+
+
+class RestartRefused(Exception):
+    """The circuit breaker does not allow restarting the container right now."""
+
+
+class RestartBreaker:
+    """
+    Per-container circuit breaker against restart loops.
+
+    At most ``max_restarts`` restarts are allowed in any ``window`` seconds,
+    and consecutive restarts must be spaced by a cooldown that doubles with
+    each recent restart (``backoff``, then 2x, 4x...). When a service keeps
+    failing under sustained load, restarting it again only adds downtime, so
+    the breaker stops the loop and the caller escalates instead.
+    """
+
+    def __init__(self, max_restarts: int = 3, window: float = 600.0, backoff: float = 30.0):
+        self.max_restarts = max_restarts
+        self.window = window
+        self.backoff = backoff
+        self._restarts: typ.Dict[str, typ.Deque[float]] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def acquire(self, container_name: str) -> int:
+        """Record a restart of ``container_name``, or raise ``RestartRefused``; returns the restarts in the window."""
+        now = time.monotonic()
+        with self._lock:
+            history = self._restarts[container_name]
+            while history and history[0] <= now - self.window:
+                history.popleft()
+            if len(history) >= self.max_restarts:
+                retry = history[0] + self.window - now
+                raise RestartRefused(f"{len(history)} restarts in the last {self.window:.0f}s; the next one is allowed in {retry:.0f}s")
+            if history:
+                cooldown = self.backoff * 2 ** (len(history) - 1)
+                remaining = history[-1] + cooldown - now
+                if remaining > 0:
+                    raise RestartRefused(f"restarted {now - history[-1]:.0f}s ago; the next restart is allowed in {remaining:.0f}s")
+            history.append(now)
+            return len(history)
+
+    def cancel(self, container_name: str):
+        """Forget the restart just recorded by ``acquire``, e.g. because it failed."""
+        with self._lock:
+            history = self._restarts.get(container_name)
+            if history:
+                history.pop()
+
+
+def _is_ready(container_name: str, readiness: str, target: typ.Optional[str]) -> typ.Tuple[bool, str]:
+    if readiness == "health":
+        result = prober.probe(target)
+        return result["healthy"], f"status {result['status']}" if result["status"] else result.get("error", "")
+    if readiness == "log":
+        lines, _ = log_tailers.get(container_name).read_new(consumer="restart", pattern=target, limit=1)
+        return bool(lines), lines[0].text if lines else "no matching log line yet"
+    state = docker_cache.get(container_name).attrs.get("State") or {}
+    if readiness == "docker":
+        health = (state.get("Health") or {}).get("Status")
+        return health == "healthy", f"healthcheck {health}"
+    return bool(state.get("Running")) and not state.get("Restarting"), f"state {state.get('Status')}"
+
+
+class RestartOrchestrator:
+    """
+    Restarts a container and waits until it is actually ready to serve.
+
+    Readiness is one of: ``health`` (``target`` URL answers its health check),
+    ``docker`` (the container's own healthcheck reports healthy), ``log``
+    (a line matching the ``target`` regex appears after the restart) or
+    ``running``. Checks are polled with exponential backoff up to
+    ``timeout`` seconds and the measured time to ready is reported, so the
+    caller neither re-probes a half-started app nor restarts it again.
+    """
+
+    def __init__(self, breaker: RestartBreaker, timeout: float = 60.0, poll_interval: float = 0.25, max_poll_interval: float = 2.0, stop_timeout: int = 10):
+        self.breaker = breaker
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.stop_timeout = stop_timeout
+        self.times_to_ready: typ.Dict[str, typ.Deque[float]] = defaultdict(lambda: deque(maxlen=20))
+        self._listeners: typ.List[typ.Callable[[str], None]] = []
+
+    def on_restart(self, listener: typ.Callable[[str], None]):
+        """Call ``listener(container_name)`` after every restart, e.g. to drop cached tool results."""
+        self._listeners.append(listener)
+
+    def default_readiness(self, container_name: str) -> str:
+        config = docker_cache.get(container_name).attrs.get("Config") or {}
+        return "docker" if config.get("Healthcheck") else "running"
+
+    def restart(self, container_name: str, readiness: typ.Optional[str] = None, target: typ.Optional[str] = None, timeout: typ.Optional[float] = None) -> dict:
+        """
+        Restart ``container_name`` and wait for readiness.
+
+        Returns a dict with ``ready``, ``readiness``, ``restart_seconds``,
+        ``time_to_ready`` (seconds from the restart call, ``None`` if not
+        ready), ``detail`` (the last check's outcome) and ``restarts_in_window``.
+        Raises ``RestartRefused`` when the breaker is open, ``ValueError``
+        for an unknown readiness check or a missing target, and the Docker
+        errors of ``Container.restart``.
+        """
+        readiness = readiness or self.default_readiness(container_name)
+        if readiness not in READINESS_CHECKS:
+            raise ValueError(f"Unknown readiness check '{readiness}', expected one of {', '.join(READINESS_CHECKS)}")
+        if readiness in ("health", "log") and not target:
+            raise ValueError(f"The '{readiness}' readiness check needs a target")
+        if readiness == "log":
+            re.compile(target)
+            # Only lines written after the restart count
+            log_tailers.get(container_name).read_new(consumer="restart", limit=1)
+        container = docker_cache.get(container_name)
+        restarts = self.breaker.acquire(container_name)
+
+        started = time.monotonic()
+        try:
+            container.restart(timeout=self.stop_timeout)
+        except Exception:
+            # A restart that never happened must not count against the breaker
+            self.breaker.cancel(container_name)
+            raise
+        restarted = time.monotonic()
+        docker_cache.invalidate(container.id, container.name)
+        for listener in self._listeners:
+            listener(container_name)
+
+        deadline = started + (timeout or self.timeout)
+        delay = self.poll_interval
+        while True:
+            ready, detail = _is_ready(container_name, readiness, target)
+            now = time.monotonic()
+            if ready or now >= deadline:
+                break
+            time.sleep(min(delay, deadline - now))
+            delay = min(delay * 2, self.max_poll_interval)
+        time_to_ready = now - started if ready else None
+        if ready:
+            self.times_to_ready[container_name].append(time_to_ready)
+        return {
+            "ready": ready,
+            "readiness": readiness,
+            "restart_seconds": restarted - started,
+            "time_to_ready": time_to_ready,
+            "detail": detail,
+            "restarts_in_window": restarts,
+        }
+
+    def mean_time_to_ready(self, container_name: str) -> typ.Optional[float]:
+        samples = self.times_to_ready.get(container_name)
+        return sum(samples) / len(samples) if samples else None
+
+
+restart_orchestrator = RestartOrchestrator(
+    RestartBreaker(
+        max_restarts=int(os.getenv("RESTART_MAX_PER_WINDOW", "3")),
+        window=float(os.getenv("RESTART_WINDOW", "600")),
+        backoff=float(os.getenv("RESTART_BACKOFF", "30")),
+    ),
+    timeout=float(os.getenv("RESTART_READY_TIMEOUT", "60")),
+)
@@ -0,0 +1,216 @@
+import threading
+import time
+import typing as typ
+from array import array
+
+import docker
+
+from tools.docker_client import get_container
+
+FIELDS = ("time", "cpu_percent", "memory_bytes", "memory_percent", "net_rx_rate", "net_tx_rate", "block_read_rate", "block_write_rate")
+
+
+class TimeSeries:
+    """
+    Fixed-size ring of samples, one preallocated ``array('d')`` per field.
+
+    Appending overwrites the oldest sample in place, so memory stays at
+    ``capacity * len(FIELDS)`` doubles however long the collector runs.
+    """
+
+    def __init__(self, capacity: int = 900):
+        self.capacity = capacity
+        self._columns = {field: array("d", bytes(8 * capacity)) for field in FIELDS}
+        self._next = 0
+        self.size = 0
+
+    def append(self, sample: typ.Dict[str, float]):
+        for field, column in self._columns.items():
+            column[self._next] = sample[field]
+        self._next = (self._next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def window(self, seconds: float, now: typ.Optional[float] = None) -> typ.Dict[str, typ.List[float]]:
+        """Samples from the last ``seconds``, oldest first, as one list per field."""
+        since = (now or time.time()) - seconds
+        times = self._columns["time"]
+        positions = []
+        for offset in range(1, self.size + 1):
+            position = (self._next - offset) % self.capacity
+            if times[position] < since:
+                break
+            positions.append(position)
+        positions.reverse()
+        return {field: [column[position] for position in positions] for field, column in self._columns.items()}
+
+
+def _summary(values: typ.List[float]) -> dict:
+    ordered = sorted(values)
+    return {
+        "last": values[-1],
+        "avg": sum(values) / len(values),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "max": ordered[-1],
+    }
+
+
+def _block_bytes(stats: dict) -> typ.Tuple[int, int]:
+    read = write = 0
+    for entry in (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or ():
+        op = entry.get("op", "").lower()
+        if op == "read":
+            read += entry.get("value", 0)
+        elif op == "write":
+            write += entry.get("value", 0)
+    return read, write
+
+
+def _net_bytes(stats: dict) -> typ.Tuple[int, int]:
+    networks = (stats.get("networks") or {}).values()
+    return sum(n.get("rx_bytes", 0) for n in networks), sum(n.get("tx_bytes", 0) for n in networks)
+
+
+def cpu_percent(stats: dict) -> typ.Optional[float]:
+    """CPU use between this sample and the previous one, as ``docker stats`` computes it."""
+    cpu, precpu = stats.get("cpu_stats") or {}, stats.get("precpu_stats") or {}
+    if "system_cpu_usage" not in precpu:
+        return None
+    cpu_delta = cpu["cpu_usage"]["total_usage"] - precpu["cpu_usage"]["total_usage"]
+    system_delta = cpu["system_cpu_usage"] - precpu["system_cpu_usage"]
+    online = cpu.get("online_cpus") or len(cpu["cpu_usage"].get("percpu_usage") or ()) or 1
+    return cpu_delta / system_delta * online * 100 if system_delta > 0 and cpu_delta >= 0 else 0.0
+
+
+def memory_bytes(stats: dict) -> typ.Tuple[float, float]:
+    """Working set (usage minus page cache) and its percentage of the limit."""
+    memory = stats.get("memory_stats") or {}
+    usage = memory.get("usage", 0)
+    details = memory.get("stats") or {}
+    # cgroup v1 reports "cache", v2 "inactive_file"
+    usage -= details.get("inactive_file", details.get("cache", 0))
+    limit = memory.get("limit") or 0
+    return float(usage), usage / limit * 100 if limit else 0.0
+
+
+class StatsCollector:
+    """
+    Follows one container's stats stream and keeps derived rates in a ``TimeSeries``.
+
+    Docker pushes a sample about every second on the stream; CPU% comes from
+    the cpu/precpu pair in each sample and network/block I/O rates from the
+    deltas between consecutive samples, so a query is a scan of memory rather
+    than a blocking ~1-2s ``stats(stream=False)`` call. The stream is reopened
+    with backoff when the container stops or restarts; counter resets do not
+    produce negative rates.
+    """
+
+    def __init__(self, container_name: str, capacity: int = 900, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self.container_name = container_name
+        self.series = TimeSeries(capacity)
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.error: typ.Optional[str] = None
+        self._lock = threading.Lock()
+        self._stream = None
+        self._previous: typ.Optional[typ.Tuple[float, int, int, int, int]] = None
+        self._stopped = threading.Event()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._follow, name=f"stats-{container_name}", daemon=True)
+
+    def start(self, wait: float = 3.0):
+        """Start collecting; waits up to ``wait`` seconds for the first usable sample."""
+        self._thread.start()
+        self._ready.wait(wait)
+
+    def _follow(self):
+        delay = self.reconnect_delay
+        while not self._stopped.is_set():
+            try:
+                self._stream = get_container(self.container_name).stats(stream=True, decode=True)
+                self.error = None
+                self._previous = None
+                for stats in self._stream:
+                    if self._stopped.is_set():
+                        return
+                    self._add(stats)
+                    delay = self.reconnect_delay
+            except docker.errors.NotFound:
+                self.error = f"Container '{self.container_name}' not found."
+            except Exception as e:
+                self.error = str(e)
+            self._ready.set()
+            self._stopped.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _add(self, stats: dict, now: typ.Optional[float] = None):
+        now = now or time.time()
+        cpu = cpu_percent(stats)
+        counters = (now, *_net_bytes(stats), *_block_bytes(stats))
+        previous, self._previous = self._previous, counters
+        # A stopped container streams empty samples; the first one has no precpu
+        if cpu is None or previous is None or not stats.get("memory_stats"):
+            return
+        elapsed = now - previous[0]
+        rates = [max(0.0, (current - before) / elapsed) if elapsed > 0 else 0.0 for current, before in zip(counters[1:], previous[1:])]
+        memory, memory_percent = memory_bytes(stats)
+        with self._lock:
+            self.series.append({
+                "time": now,
+                "cpu_percent": cpu,
+                "memory_bytes": memory,
+                "memory_percent": memory_percent,
+                "net_rx_rate": rates[0],
+                "net_tx_rate": rates[1],
+                "block_read_rate": rates[2],
+                "block_write_rate": rates[3],
+            })
+        self._ready.set()
+
+    def summary(self, window: float = 300.0) -> typ.Optional[dict]:
+        """last/avg/p95/max of every metric over the last ``window`` seconds, or ``None`` without samples."""
+        with self._lock:
+            samples = self.series.window(window)
+        times = samples.pop("time")
+        if not times:
+            return None
+        result = {field: _summary(values) for field, values in samples.items()}
+        result["samples"] = len(times)
+        result["span_seconds"] = times[-1] - times[0]
+        return result
+
+    def close(self):
+        self._stopped.set()
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except ValueError:
+                # A plain generator blocked in the collector thread; it exits on the next sample
+                pass
+
+
+class StatsCollectors:
+    """One ``StatsCollector`` per container, started on first use."""
+
+    def __init__(self, **collector_options):
+        self.collector_options = collector_options
+        self._collectors: typ.Dict[str, StatsCollector] = {}
+        self._lock = threading.Lock()
+
+    def get(self, container_name: str) -> StatsCollector:
+        with self._lock:
+            collector = self._collectors.get(container_name)
+            started = collector is None
+            if started:
+                collector = self._collectors[container_name] = StatsCollector(container_name, **self.collector_options)
+        if started:
+            collector.start()
+        return collector
+
+    def close(self):
+        with self._lock:
+            collectors, self._collectors = list(self._collectors.values()), {}
+        for collector in collectors:
+            collector.close()
+
+
+stats_collectors = StatsCollectors()
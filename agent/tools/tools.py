@@ -1,6 +1,19 @@
+import re
+
 from smolagents import tool
 import docker
 
+from tools.alerts import alert_dispatcher
+from tools.diagnostics import diagnose, format_report
+from tools.docker_client import get_container, redacted_env
+from tools.fleet import fleet_snapshots, format_snapshot
+from tools.log_digest import format_digest, log_digesters
+from tools.log_tailer import log_tailers
+from tools.memoize import tool_cache
+from tools.prober import prober
+from tools.restart import RestartRefused, restart_orchestrator
+from tools.stats_collector import stats_collectors
+
 @tool
 def check_endpoint_health(url: str = "http://localhost:5000") -> str:
     """
@@ -12,15 +25,45 @@ def check_endpoint_health(url: str = "http://localhost:5000") -> str:
     Returns:
         str: The health status of the endpoint.
     """
-    import requests
-    try:
-        response = requests.get(f"{url}/health_check")
-        if response.status_code == 200:
-            return f"Endpoint {url} is healthy."
-        else:
-            return f"Endpoint {url} returned status code {response.status_code}."
-    except requests.exceptions.RequestException as e:
-        return f"Error checking endpoint {url}: {str(e)}"
+    result = prober.probe(url)
+    return _describe_probe(result)
+
+@tool
+def check_endpoints_health(urls: list) -> str:
+    """
+    Check the health of several web application endpoints at once.
+    The endpoints are probed concurrently, so this takes about as long as the slowest one.
+
+    Args:
+        urls (list): The URLs of the web application endpoints to check.
+
+    Returns:
+        str: One health status line per endpoint.
+    """
+    return "\n".join(_describe_probe(result) for result in prober.probe_many(urls))
+
+def _describe_probe(result: dict) -> str:
+    url, latency = result["url"], result["latency_ms"]
+    if result["healthy"]:
+        return f"Endpoint {url} is healthy ({latency} ms)."
+    if result["status"] is not None:
+        return f"Endpoint {url} returned status code {result['status']} ({latency} ms)."
+    return f"Error checking endpoint {url}: {result['error']} ({latency} ms)."
+
+@tool
+def diagnose_service(container_name: str, url: str = "http://localhost:5000") -> str:
+    """
+    Triage a service in one step: gathers its health check, recent warning and error logs, container state,
+    resource usage and environment configuration at the same time and returns them as one report.
+
+    Args:
+        container_name (str): The name of the Docker container running the service.
+        url (str): The URL of the service's web application endpoint.
+
+    Returns:
+        str: A diagnostics report with one section per source; a failed source is reported without hiding the others.
+    """
+    return format_report(container_name, diagnose(container_name, url))
 
 @tool
 def get_container_status(container_name: str) -> str:
@@ -34,8 +77,7 @@ def get_container_status(container_name: str) -> str:
         str: The status of the container (e.g., running, stopped, etc.).
     """
     try:
-        client = docker.from_env()
-        container = client.containers.get(container_name)
+        container = get_container(container_name)
         return f"Container '{container_name}' is {container.status}."
     except docker.errors.NotFound:
         return f"Container '{container_name}' not found."
@@ -43,54 +85,142 @@ def get_container_status(container_name: str) -> str:
         return f"Error checking container status: {str(e)}"
     
 @tool
-def get_recent_logs(container_name: str, lines: int = 100) -> str:
+def get_fleet_status(label: str = None, project: str = None) -> str:
+    """
+    Check the status of every Docker container at once, and what changed since the previous check.
+    Shows state, health, restart count, uptime and exit code per container.
+
+    Args:
+        label (str): Only include containers with this label, as "key" or "key=value" (optional).
+        project (str): Only include containers of this docker compose project (optional).
+
+    Returns:
+        str: One status line per container, followed by the changes since the previous check.
+    """
+    try:
+        return format_snapshot(*fleet_snapshots.snapshot(label, project))
+    except Exception as e:
+        return f"Error checking fleet status: {str(e)}"
+    
+@tool
+def get_recent_logs(container_name: str, lines: int = 100, level: str = None, pattern: str = None) -> str:
     """
     Fetch the most recent logs from a Docker container.
         
     Args:
         container_name (str): The name of the Docker container to fetch logs from.
         lines (int): The number of log lines to retrieve (default is 100).
+        level (str): Only return lines at this level or above, e.g. "WARNING" or "ERROR" (optional).
+        pattern (str): Only return lines matching this regular expression (optional).
         
     Returns:
         str: The recent logs from the container.
     """
+    tailer = log_tailers.get(container_name)
     try:
-        client = docker.from_env()
-        container = client.containers.get(container_name)
-        logs = container.logs(tail=lines).decode('utf-8')
-        return logs if logs else "No logs found."
-    except docker.errors.NotFound:
-        return f"Container '{container_name}' not found."
-    except Exception as e:
-        return f"Error fetching logs: {str(e)}"
+        logs = tailer.recent(lines, level, pattern)
+    except re.error as e:
+        return f"Error fetching logs: invalid pattern '{pattern}': {e}"
+    if not logs and tailer.error:
+        return f"Error fetching logs: {tailer.error}"
+    return "\n".join(line.text for line in logs) if logs else "No logs found."
+
+@tool
+def get_new_logs(container_name: str, level: str = None, pattern: str = None) -> str:
+    """
+    Fetch only the log lines a Docker container wrote since the last call of this tool.
+    Cheap to call repeatedly while monitoring.
+
+    Args:
+        container_name (str): The name of the Docker container to fetch logs from.
+        level (str): Only return lines at this level or above, e.g. "WARNING" or "ERROR" (optional).
+        pattern (str): Only return lines matching this regular expression (optional).
+
+    Returns:
+        str: The new log lines, or a note that there are none.
+    """
+    tailer = log_tailers.get(container_name)
+    try:
+        logs, missed = tailer.read_new(level=level, pattern=pattern)
+    except re.error as e:
+        return f"Error fetching logs: invalid pattern '{pattern}': {e}"
+    if not logs and tailer.error:
+        return f"Error fetching logs: {tailer.error}"
+    output = "\n".join(line.text for line in logs) if logs else "No new logs."
+    if missed:
+        output = f"({missed} older lines were dropped before they could be read)\n{output}"
+    return output
     
 @tool
-def check_resource_usage() -> str:
+def get_log_digest(container_name: str) -> str:
+    """
+    Summarize the logs a Docker container wrote since the last digest.
+    Repeated lines are collapsed into templates with counts (variable parts shown as <*>),
+    tracebacks are grouped by exception, and the most important templates (errors, new ones) come first.
+    Use get_log_samples to see the raw lines behind a template.
+
+    Args:
+        container_name (str): The name of the Docker container to summarize logs for.
+
+    Returns:
+        str: A compact, ranked digest of the new log lines.
+    """
+    tailer = log_tailers.get(container_name)
+    lines, missed = tailer.read_new(consumer="digest", limit=None)
+    if not lines and tailer.error:
+        return f"Error fetching logs: {tailer.error}"
+    output = format_digest(log_digesters.get(container_name).digest(lines))
+    if missed:
+        output = f"({missed} older lines were dropped before they could be summarized)\n{output}"
+    return output
+
+@tool
+def get_log_samples(container_name: str, template_id: int) -> str:
     """
-    Check the resource usage of the system.
+    Show recent raw log lines behind one template of a log digest.
+
+    Args:
+        container_name (str): The name of the Docker container the digest was made for.
+        template_id (int): The template id shown as #id in the digest.
+
+    Returns:
+        str: Up to 5 recent raw log lines matching the template.
+    """
+    samples = log_digesters.get(container_name).samples(template_id)
+    if samples is None:
+        return f"No template #{template_id} for container '{container_name}'."
+    return "\n".join(samples)
+
+@tool
+def check_resource_usage(container_name: str, window_minutes: float = 5.0) -> str:
+    """
+    Check the resource usage of a Docker container over a recent time window.
     
     Args:
-        None
+        container_name (str): The name of the Docker container to check.
+        window_minutes (float): How many minutes of history to summarize (default is 5).
     Returns:
-        str: A summary of resource usage (CPU, memory, disk, etc.).
+        str: A summary of resource usage (CPU %, memory, network and disk I/O rates) with last, average, p95 and max values.
     """
-    try:
-        client = docker.from_env()
-        stats = client.stats(stream=False)
-        cpu_usage = stats['cpu_stats']['cpu_usage']['total_usage']
-        memory_usage = stats['memory_stats']['usage']
-        disk_usage = stats['blkio_stats']['io_service_bytes_recursive']
-        
-        return (f"CPU Usage: {cpu_usage} nanoseconds\n"
-                f"Memory Usage: {memory_usage} bytes\n"
-                f"Disk Usage: {disk_usage}")
-    except Exception as e:
-        return f"Error checking resource usage: {str(e)}"
+    collector = stats_collectors.get(container_name)
+    summary = collector.summary(window_minutes * 60)
+    if summary is None:
+        if collector.error:
+            return f"Error checking resource usage: {collector.error}"
+        return f"No resource usage samples for '{container_name}' yet."
+    cpu, memory = summary["cpu_percent"], summary["memory_bytes"]
+    mib = 1024 * 1024
+    return (f"Resource usage of '{container_name}' over {summary['span_seconds']:.0f}s ({summary['samples']} samples):\n"
+            f"CPU Usage: last {cpu['last']:.1f}%, avg {cpu['avg']:.1f}%, p95 {cpu['p95']:.1f}%, max {cpu['max']:.1f}%\n"
+            f"Memory Usage: last {memory['last'] / mib:.1f} MiB ({summary['memory_percent']['last']:.1f}% of limit), max {memory['max'] / mib:.1f} MiB\n"
+            f"Network: rx avg {summary['net_rx_rate']['avg']:.0f} B/s, tx avg {summary['net_tx_rate']['avg']:.0f} B/s\n"
+            f"Disk I/O: read avg {summary['block_read_rate']['avg']:.0f} B/s, write avg {summary['block_write_rate']['avg']:.0f} B/s")
     
 @tool
 def send_slack_alert(message: str) -> str:
     """
     Send an alert message to a Slack channel.
+    The alert is delivered in the background; identical alerts sent within a minute (by default) are combined into one message with a count.
     
     Args:
         message (str): The alert message to send.
@@ -98,54 +228,93 @@ def send_slack_alert(message: str) -> str:
     Returns:
         str: Confirmation of the alert sent.
     """
-    pass  # Implement the logic to send a Slack alert
+    outcome = alert_dispatcher.submit(message)
+    if outcome == "coalesced":
+        return "An identical alert was sent recently; this one will be included in its repeat count."
+    if outcome == "dropped":
+        return "Alert queue is full; the alert was dropped."
+    return "Alert queued for delivery to Slack."
 
 @tool
-def restart_container(container_name: str) -> str: 
+def restart_container(container_name: str, readiness: str = None, target: str = None) -> str: 
     """
-    Restart a Docker container to self-heal it.
+    Restart a Docker container to self-heal it, then wait until it is ready again.
+    Restarts are capped per container: if it was restarted too often recently the restart is refused and the issue should be escalated.
     Args:
-        container_name (str): The name of the Docker container to fetch logs from.
+        container_name (str): The name of the Docker container to restart.
+        readiness (str): How to tell the container is ready: "health" (the target URL passes its health check), "docker" (the container healthcheck is healthy), "log" (a log line matches the target regex) or "running" (optional, defaults to "docker" when the container has a healthcheck, otherwise "running").
+        target (str): The URL for the "health" check or the regular expression for the "log" check (optional).
     Returns:
-        str: Confirmation of the restart action or an error message.
+        str: Confirmation of the restart with the measured time to ready, or an error message.
     """
     try:
-        client = docker.from_env()
-        container = client.containers.get(container_name)
-        container.restart()
-        return f"Self-heal script '{container_name}' executed successfully."
+        result = restart_orchestrator.restart(container_name, readiness, target)
+    except RestartRefused as e:
+        return f"Restart of '{container_name}' refused to avoid a restart loop: {str(e)}."
     except docker.errors.NotFound:
         return f"Container '{container_name}' not found."
     except Exception as e:
         return f"Error running self-heal script: {str(e)}"
+    if result["ready"]:
+        status = f"is ready ({result['readiness']} check) {result['time_to_ready']:.1f}s after the restart"
+    else:
+        status = f"is NOT ready after {restart_orchestrator.timeout:.0f}s ({result['readiness']} check: {result['detail']})"
+    return (f"Container '{container_name}' restarted in {result['restart_seconds']:.1f}s and {status}. "
+            f"Restarts in the current window: {result['restarts_in_window']}/{restart_orchestrator.breaker.max_restarts}.")
     
 @tool
 def get_container_environment_variables(container_name: str) -> str:
     """
-    Get the configuration of a Docker container.
+    Get the configuration of a Docker container. Secret values are redacted.
     Args:
         container_name (str): The name of the Docker container to fetch environment variables from.
     Returns:
         str: The environment variables of the container or an error message.
     """
     try:
-        client = docker.from_env()
-        container = client.containers.get(container_name)
-        env_vars = container.attrs['Config']['Env']
+        env_vars = redacted_env(get_container(container_name))
         return f"Environment variables for '{container_name}': {env_vars}"
     except docker.errors.NotFound:
         return f"Container '{container_name}' not found."
     except Exception as e:
         return f"Error fetching environment variables: {str(e)}"
 
+# Seconds each read-only tool's result is reused for identical arguments; tools
+# with side effects or read cursors (new logs, digests, fleet diffs) are never cached
+TOOL_CACHE_TTLS = {
+    "check_endpoint_health": 5,
+    "check_endpoints_health": 5,
+    "get_container_status": 10,
+    "get_container_environment_variables": 300,
+    "get_recent_logs": 5,
+    "check_resource_usage": 10,
+}
+
+def _forget_restarted(container_name: str):
+    # A restart changes everything cached about that container, including its
+    # health, which is keyed on a URL that does not name the container
+    tool_cache.invalidate(container_name=container_name)
+    tool_cache.invalidate("check_endpoint_health")
+    tool_cache.invalidate("check_endpoints_health")
+
+restart_orchestrator.on_restart(_forget_restarted)
+
 def get_tools():
     """
     Returns a list of tools available for the agent
     """
-    return [
+    return tool_cache.wrap_all([
         check_endpoint_health,
+        check_endpoints_health,
+        diagnose_service,
+        get_container_status,
+        get_container_environment_variables,
+        get_fleet_status,
         get_recent_logs,
+        get_new_logs,
+        get_log_digest,
+        get_log_samples,
         check_resource_usage,
         send_slack_alert,
         restart_container
-    ]
\ No newline at end of file
+    ], TOOL_CACHE_TTLS)
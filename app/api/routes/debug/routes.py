@@ -0,0 +1,28 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from core.auth import validate_token
+
+debug_blueprint = Blueprint('debug', __name__, url_prefix='/debug')
+
+PROFILE_MIMETYPES = {
+    'prof': 'application/octet-stream',
+    'html': 'text/html',
+}
+
+@debug_blueprint.route('/profiles', methods=['GET'])
+@validate_token
+def list_profiles():
+    return jsonify(current_app.extensions["profiler"].store.list()), 200
+
+@debug_blueprint.route('/profiles/<profile_id>', methods=['GET'])
+@validate_token
+def get_profile(profile_id):
+    profile = current_app.extensions["profiler"].store.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    # ?format=text returns the readable summary instead of the raw profile
+    if request.args.get('format') == 'text':
+        return Response(profile['summary'], mimetype='text/plain')
+    response = Response(profile['data'], mimetype=PROFILE_MIMETYPES[profile['format']])
+    response.headers['Content-Disposition'] = f"attachment; filename={profile_id}.{profile['format']}"
+    return response
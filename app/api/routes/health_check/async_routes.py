@@ -0,0 +1,27 @@
+from quart import Blueprint, jsonify, current_app, request
+
+# Async variant of api/routes/health_check/routes.py for the ASGI app.
+health_check_async_blueprint = Blueprint('health_check', __name__)
+
+@health_check_async_blueprint.route('/health_check', methods=['GET'])
+async def health_check():
+    if request.args.get('deep', type=int):
+        # Served from the monitor's cached snapshot, so this never waits on a dependency
+        snapshot = current_app.extensions["health_monitor"].snapshot()
+        if not current_app.config["HEALTHY"]:
+            snapshot["status"] = "unhealthy"
+        if snapshot["status"] == "ok":
+            return jsonify(snapshot), 200
+        current_app.logger.error("Deep healthcheck failed: %s", snapshot["checks"])
+        return jsonify(snapshot), 500
+    if current_app.config["HEALTHY"]:
+        current_app.logger.info("Healthcheck passed")
+        return jsonify({'status': 'ok'}), 200
+    else:
+        current_app.logger.error("Healthcheck failed, service is unhealthy must be restarted")
+        return jsonify({'status': 'unhealthy'}), 500
+
+@health_check_async_blueprint.route("/fail")
+async def fail():
+    current_app.config["HEALTHY"] = False
+    return "Healthcheck will now fail", 200
@@ -1,10 +1,27 @@
-from flask import Blueprint, jsonify,current_app
+from flask import Blueprint, jsonify, current_app, request
     
 health_check_blueprint = Blueprint('health_check', __name__)
 
+def deep_health_check():
+    snapshot = current_app.extensions["health_monitor"].snapshot()
+    if not current_app.config["HEALTHY"]:
+        snapshot["status"] = "unhealthy"
+    if snapshot["status"] == "ok":
+        if current_app.extensions["load_shedder"].is_shedding():
+            snapshot["status"] = "degraded"
+        return jsonify(snapshot), 200
+    current_app.logger.error("Deep healthcheck failed: %s", snapshot["checks"])
+    return jsonify(snapshot), 500
+
 @health_check_blueprint.route('/health_check', methods=['GET'])
 def health_check():
+    if request.args.get('deep', type=int):
+        return deep_health_check()
     if current_app.config["HEALTHY"]:
+        # Shedding load means the app is protecting itself, not that it needs a restart
+        if current_app.extensions["load_shedder"].is_shedding():
+            current_app.logger.warning("Healthcheck passed, service is shedding load")
+            return jsonify({'status': 'degraded'}), 200
         current_app.logger.info("Healthcheck passed")
         return jsonify({'status': 'ok'}), 200
     else:
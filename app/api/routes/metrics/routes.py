@@ -0,0 +1,8 @@
+from flask import Blueprint, Response, current_app
+
+metrics_blueprint = Blueprint('metrics', __name__)
+
+@metrics_blueprint.route('/metrics', methods=['GET'])
+def metrics():
+    body = current_app.extensions["metrics"].render()
+    return Response(body, mimetype='text/plain; version=0.0.4')
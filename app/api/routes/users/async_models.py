@@ -0,0 +1,224 @@
+import asyncio
+import typing as typ
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import current_app
+
+from api.routes.users.models import (
+    SEARCH_OVERFETCH,
+    USER_STATEMENTS,
+    DuplicateEmailError,
+    PostgresUserStore,
+    UserStore,
+    _batch_results,
+    _email_key,
+    _row_to_user,
+    _user_terms,
+    create_user_store,
+)
+from api.routes.users.search import prefix_upper_bound
+from core.db import DEFAULT_CONNECT_TIMEOUT, DEFAULT_POOL_SIZE, get_scheme, postgres_connector
+
+
+class AsyncUserStore:
+    """Async counterpart of ``UserStore``; see it for the method contracts."""
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def create(self, name: str, email: str) -> dict:
+        raise NotImplementedError
+
+    async def create_many(self, rows: typ.Sequence[typ.Tuple[str, str]]) -> typ.List[typ.Optional[dict]]:
+        raise NotImplementedError
+
+    async def get(self, user_id: int) -> typ.Optional[dict]:
+        raise NotImplementedError
+
+    async def get_by_email(self, email: str) -> typ.Optional[dict]:
+        raise NotImplementedError
+
+    async def all(self) -> typ.List[dict]:
+        raise NotImplementedError
+
+    async def page(self, after: int = 0, limit: int = 100) -> typ.List[dict]:
+        raise NotImplementedError
+
+    async def search(self, field: str, prefix: str, limit: int = 20) -> typ.List[dict]:
+        raise NotImplementedError
+
+    async def version(self) -> int:
+        raise NotImplementedError
+
+    async def ping(self):
+        raise NotImplementedError
+
+    async def iter_users(self, after: int = 0, chunk_size: int = 500) -> typ.AsyncIterator[dict]:
+        while True:
+            users = await self.page(after, chunk_size)
+            if not users:
+                return
+            for user in users:
+                yield user
+            after = users[-1]['id']
+
+
+class ThreadedAsyncUserStore(AsyncUserStore):
+    """
+    Runs a synchronous store on a dedicated, bounded thread pool.
+
+    Used for the in-memory and SQLite backends, which have no async driver.
+    The executor is sized like the store's connection pool and separate from
+    the event loop's default executor, so slow queries queue here instead of
+    starving unrelated work.
+    """
+
+    def __init__(self, store: UserStore, max_workers: int = DEFAULT_POOL_SIZE):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='user-store')
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def close(self):
+        self._executor.shutdown(wait=False)
+        self.store.close()
+
+    async def create(self, name: str, email: str) -> dict:
+        return await self._run(self.store.create, name, email)
+
+    async def create_many(self, rows: typ.Sequence[typ.Tuple[str, str]]) -> typ.List[typ.Optional[dict]]:
+        return await self._run(self.store.create_many, rows)
+
+    async def get(self, user_id: int) -> typ.Optional[dict]:
+        return await self._run(self.store.get, user_id)
+
+    async def get_by_email(self, email: str) -> typ.Optional[dict]:
+        return await self._run(self.store.get_by_email, email)
+
+    async def all(self) -> typ.List[dict]:
+        return await self._run(self.store.all)
+
+    async def page(self, after: int = 0, limit: int = 100) -> typ.List[dict]:
+        return await self._run(self.store.page, after, limit)
+
+    async def search(self, field: str, prefix: str, limit: int = 20) -> typ.List[dict]:
+        return await self._run(self.store.search, field, prefix, limit)
+
+    async def version(self) -> int:
+        return await self._run(self.store.version)
+
+    async def ping(self):
+        await self._run(self.store.ping)
+
+
+class AsyncPostgresUserStore(AsyncUserStore):
+    """
+    PostgreSQL backend on an asyncpg connection pool.
+
+    The pool is separate from the WSGI app's psycopg2 pool and bounded by
+    ``pool_size``; waiting for a connection suspends the request instead of
+    holding a thread. asyncpg prepares and caches every statement per
+    connection. The schema is created by the synchronous store on ``open``.
+    """
+
+    def __init__(self, database_url: str, pool_size: int = DEFAULT_POOL_SIZE):
+        self.database_url = database_url
+        self.pool_size = pool_size
+        self.pool = None
+
+    async def open(self):
+        import asyncpg
+
+        self.integrity_error = asyncpg.UniqueViolationError
+        # Reuse the synchronous store's schema setup so both modes share one definition
+        sync_store = PostgresUserStore(postgres_connector(self.database_url), 1)
+        await asyncio.get_running_loop().run_in_executor(None, sync_store.ping)
+        sync_store.close()
+        self.pool = await asyncpg.create_pool(self.database_url, min_size=1, max_size=self.pool_size, timeout=DEFAULT_CONNECT_TIMEOUT)
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+
+    async def _fetch(self, name: str, *args) -> list:
+        async with self.pool.acquire() as conn:
+            return await conn.fetch(USER_STATEMENTS[name][1], *args)
+
+    async def _insert_terms(self, conn, users: typ.Sequence[dict]):
+        terms = _user_terms(users)
+        if terms:
+            sql = PostgresUserStore.batch_statements['users_terms_insert_batch'][1]
+            await conn.execute(sql, *(list(column) for column in zip(*terms)))
+
+    async def create(self, name: str, email: str) -> dict:
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                try:
+                    row = await conn.fetchrow(USER_STATEMENTS['users_insert'][1], name, email, _email_key(email) or None)
+                except self.integrity_error:
+                    raise DuplicateEmailError(email)
+                user = _row_to_user(row)
+                await self._insert_terms(conn, [user])
+                await conn.execute(USER_STATEMENTS['users_version_bump'][1])
+        return user
+
+    async def create_many(self, rows: typ.Sequence[typ.Tuple[str, str]]) -> typ.List[typ.Optional[dict]]:
+        if not rows:
+            return []
+        keys = [_email_key(email) or None for _, email in rows]
+        sql = PostgresUserStore.batch_statements['users_insert_batch'][1]
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                inserted = await conn.fetch(sql, [name for name, _ in rows], [email for _, email in rows], keys)
+                await self._insert_terms(conn, [_row_to_user(row) for row in inserted])
+                if inserted:
+                    await conn.execute(USER_STATEMENTS['users_version_bump'][1])
+        return _batch_results(keys, inserted)
+
+    async def get(self, user_id: int) -> typ.Optional[dict]:
+        rows = await self._fetch('users_by_id', user_id)
+        return _row_to_user(rows[0]) if rows else None
+
+    async def get_by_email(self, email: str) -> typ.Optional[dict]:
+        key = _email_key(email)
+        if not key:
+            return None
+        rows = await self._fetch('users_by_email', key)
+        return _row_to_user(rows[0]) if rows else None
+
+    async def all(self) -> typ.List[dict]:
+        return [_row_to_user(row) for row in await self._fetch('users_all')]
+
+    async def page(self, after: int = 0, limit: int = 100) -> typ.List[dict]:
+        return [_row_to_user(row) for row in await self._fetch('users_page', after, limit)]
+
+    async def search(self, field: str, prefix: str, limit: int = 20) -> typ.List[dict]:
+        rows = await self._fetch('users_search', field, prefix, prefix_upper_bound(prefix), limit * SEARCH_OVERFETCH)
+        users = {}
+        for row in rows:
+            users.setdefault(row[0], _row_to_user(row))
+            if len(users) >= limit:
+                break
+        return list(users.values())
+
+    async def version(self) -> int:
+        return (await self._fetch('users_version'))[0][0]
+
+    async def ping(self):
+        async with self.pool.acquire() as conn:
+            await conn.execute('SELECT 1')
+
+
+def create_async_user_store(database_url: typ.Optional[str] = None, pool_size: int = DEFAULT_POOL_SIZE) -> AsyncUserStore:
+    """Async variant of ``create_user_store``: asyncpg for PostgreSQL, a thread pool otherwise."""
+    if database_url and get_scheme(database_url) in ('postgres', 'postgresql'):
+        return AsyncPostgresUserStore(database_url, pool_size)
+    return ThreadedAsyncUserStore(create_user_store(database_url, pool_size), pool_size)
+
+
+def get_async_user_store() -> AsyncUserStore:
+    return current_app.extensions['user_store']
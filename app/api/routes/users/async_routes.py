@@ -0,0 +1,124 @@
+from quart import Blueprint, Response, current_app, jsonify, request
+
+from api.routes.users.async_models import get_async_user_store
+from api.routes.users.models import DuplicateEmailError
+from api.routes.users.routes import (
+    NDJSON_MIMETYPE,
+    BulkCreate,
+    iter_ndjson,
+    page_body,
+    parse_batch_size,
+    parse_page_args,
+    parse_search_args,
+    users_etag,
+    validate_user,
+)
+
+# Async variants of api/routes/users/routes.py for the ASGI app; same URLs and responses.
+users_async_blueprint = Blueprint('users', __name__)
+
+async def _stream_ndjson(store, after: int, dumps):
+    async for user in store.iter_users(after):
+        yield (dumps(user) + '\n').encode()
+
+@users_async_blueprint.route('/users', methods=['GET'])
+async def get_users():
+    store = get_async_user_store()
+    email = request.args.get('email')
+    if email is not None:
+        user = await store.get_by_email(email)
+        return jsonify([user] if user else []), 200
+
+    after, limit, paginated, error = parse_page_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    if request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+        return Response(_stream_ndjson(store, after, current_app.json.dumps), mimetype=NDJSON_MIMETYPE), 200
+
+    etag = users_etag(await store.version(), after, limit, paginated)
+    if request.if_none_match.contains_weak(etag):
+        response = Response('', status=304)
+        response.set_etag(etag)
+        return response
+
+    if paginated:
+        response = jsonify(page_body(await store.page(after, limit), limit))
+    else:
+        response = jsonify(await store.all())
+    response.set_etag(etag)
+    return response, 200
+
+@users_async_blueprint.route('/users/search', methods=['GET'])
+async def search_users():
+    query, fields, limit, error = parse_search_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    store = get_async_user_store()
+    users = {}
+    for search_field in fields:
+        for user in await store.search(search_field, query, limit - len(users)):
+            users.setdefault(user['id'], user)
+        if len(users) >= limit:
+            break
+    return jsonify(list(users.values())), 200
+
+@users_async_blueprint.route('/users/<int:user_id>', methods=['GET'])
+async def get_user(user_id):
+    user = await get_async_user_store().get(user_id)
+    if user is None:
+        return jsonify({'error': 'User not found'}), 404
+    return jsonify(user), 200
+
+@users_async_blueprint.route('/user', methods=['POST'])
+async def create_user():
+    data = await request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'No request body'}), 400
+
+    error = validate_user(data)
+    if error:
+        return jsonify({'error': error}), 400
+
+    try:
+        new_user = await get_async_user_store().create(data['name'], data['email'])
+    except DuplicateEmailError:
+        return jsonify({'error': 'Email already registered'}), 409
+    return jsonify(new_user), 201
+
+async def _iter_ndjson_chunks(body, loads):
+    # Parse the body as it arrives, like the sync route, so it is never buffered whole
+    pending = b''
+    async for chunk in body:
+        pending += chunk
+        if b'\n' in chunk:
+            *lines, pending = pending.split(b'\n')
+            yield list(iter_ndjson(lines, loads))
+    yield list(iter_ndjson([pending], loads))
+
+@users_async_blueprint.route('/users/bulk', methods=['POST'])
+async def bulk_create_users():
+    batch_size, error = parse_batch_size(request.args, current_app.config['BULK_BATCH_SIZE'])
+    if error:
+        return jsonify({'error': error}), 400
+
+    store = get_async_user_store()
+    bulk = BulkCreate(batch_size)
+
+    async def add(rows):
+        for row, error in rows:
+            if bulk.add(row, error):
+                bulk.record(await store.create_many(bulk.batch))
+
+    if request.mimetype == NDJSON_MIMETYPE:
+        async for rows in _iter_ndjson_chunks(request.body, current_app.json.loads):
+            await add(rows)
+    else:
+        data = await request.get_json(silent=True)
+        if not isinstance(data, list):
+            return jsonify({'error': 'Request body must be a JSON array or NDJSON'}), 400
+        await add((row, None) for row in data)
+    if bulk.batch:
+        bulk.record(await store.create_many(bulk.batch))
+    return jsonify(bulk.body()), 200
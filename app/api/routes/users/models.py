@@ -0,0 +1,547 @@
+import bisect
+import itertools
+import re
+import sqlite3
+import threading
+import typing as typ
+
+from flask import current_app
+
+from api.routes.users.search import SEARCH_FIELDS, SortedIndex, prefix_upper_bound, search_terms
+from core.db import DEFAULT_POOL_SIZE, ConnectionPool, get_scheme, postgres_connector, sqlite_connector
+
+
+class DuplicateEmailError(ValueError):
+    """Raised when a user is created with an email that is already registered."""
+
+
+def _email_key(email: str) -> str:
+    return email.strip().lower()
+
+
+class UserStore:
+    """
+    Interface shared by every user store backend.
+
+    Returned dicts must be treated as read-only.
+    """
+
+    def create(self, name: str, email: str) -> dict:
+        raise NotImplementedError
+
+    def create_many(self, rows: typ.Sequence[typ.Tuple[str, str]]) -> typ.List[typ.Optional[dict]]:
+        """
+        Create a batch of ``(name, email)`` users in one write.
+
+        Returns one entry per row, in order: the created user, or None when the
+        email is already registered (including earlier in the same batch).
+        """
+        raise NotImplementedError
+
+    def get(self, user_id: int) -> typ.Optional[dict]:
+        raise NotImplementedError
+
+    def get_by_email(self, email: str) -> typ.Optional[dict]:
+        raise NotImplementedError
+
+    def all(self) -> typ.List[dict]:
+        raise NotImplementedError
+
+    def page(self, after: int = 0, limit: int = 100) -> typ.List[dict]:
+        """Return up to ``limit`` users with an id strictly greater than ``after``."""
+        raise NotImplementedError
+
+    def search(self, field: str, prefix: str, limit: int = 20) -> typ.List[dict]:
+        """
+        Return up to ``limit`` users whose ``field`` has a word starting with ``prefix``.
+
+        ``prefix`` must already be lowercased; see ``search_terms`` for what counts as a word.
+        """
+        raise NotImplementedError
+
+    def version(self) -> int:
+        """
+        Return a number that changes whenever the stored users change.
+
+        Read it before reading data: a write landing in between then yields a
+        stale version with fresh data, which only costs a client one refetch.
+        """
+        raise NotImplementedError
+
+    def iter_users(self, after: int = 0, chunk_size: int = 500) -> typ.Iterator[dict]:
+        """
+        Yield users in id order, one page at a time.
+
+        Only one page is held at a time, so a long export neither blocks writers
+        nor loads the whole table, and users created while iterating are picked up.
+        """
+        while True:
+            users = self.page(after, chunk_size)
+            if not users:
+                return
+            yield from users
+            after = users[-1]['id']
+
+    def ping(self):
+        """Health probe: raise if the backend cannot serve queries."""
+
+    def close(self):
+        pass
+
+
+class InMemoryUserStore(UserStore):
+    """
+    Thread-safe in-memory user store.
+
+    Users are indexed by id and by email so lookups never scan the collection,
+    and ids come from a single sequence guarded by the write lock so concurrent
+    requests cannot hand out the same id twice. Data lives in the process only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._by_id: typ.Dict[int, dict] = {}
+        self._by_email: typ.Dict[str, int] = {}
+        # Ids are handed out in increasing order, so appending keeps this sorted
+        # and keyset pages can seek with a binary search.
+        self._sorted_ids: typ.List[int] = []
+        # Bumped on every write
+        self._version = 0
+        self._search = {field: SortedIndex() for field in SEARCH_FIELDS}
+
+    @staticmethod
+    def _prepare(name: str, email: str) -> tuple:
+        # Everything that can fail for a row, so it fails before the store is touched
+        key = _email_key(email)
+        terms = {field: search_terms(value) for field, value in (('name', name), ('email', email))}
+        return name, email, key, terms
+
+    def _insert(self, prepared: tuple) -> typ.Optional[dict]:
+        # Caller must hold self._lock; ``prepared`` comes from _prepare
+        name, email, key, terms = prepared
+        if key and key in self._by_email:
+            return None
+        user = {
+            'id': next(self._ids),
+            'name': name,
+            'email': email,
+        }
+        self._version += 1
+        self._by_id[user['id']] = user
+        self._sorted_ids.append(user['id'])
+        if key:
+            self._by_email[key] = user['id']
+        for field, index in self._search.items():
+            for term in terms[field]:
+                index.add(term, user['id'])
+        return user
+
+    def create(self, name: str, email: str) -> dict:
+        with self._lock:
+            user = self._insert(self._prepare(name, email))
+        if user is None:
+            raise DuplicateEmailError(email)
+        return user
+
+    def create_many(self, rows: typ.Sequence[typ.Tuple[str, str]]) -> typ.List[typ.Optional[dict]]:
+        # A bad row fails the batch before any row of it is stored
+        prepared = [self._prepare(name, email) for name, email in rows]
+        with self._lock:
+            return [self._insert(row) for row in prepared]
+
+    def get(self, user_id: int) -> typ.Optional[dict]:
+        return self._by_id.get(user_id)
+
+    def get_by_email(self, email: str) -> typ.Optional[dict]:
+        user_id = self._by_email.get(_email_key(email))
+        if user_id is None:
+            return None
+        return self._by_id.get(user_id)
+
+    def all(self) -> typ.List[dict]:
+        with self._lock:
+            return list(self._by_id.values())
+
+    def page(self, after: int = 0, limit: int = 100) -> typ.List[dict]:
+        with self._lock:
+            start = bisect.bisect_right(self._sorted_ids, after)
+            ids = self._sorted_ids[start:start + limit]
+            return [self._by_id[user_id] for user_id in ids]
+
+    def search(self, field: str, prefix: str, limit: int = 20) -> typ.List[dict]:
+        users = {}
+        with self._lock:
+            for _, user_id in self._search[field].prefix(prefix):
+                if user_id not in users:
+                    users[user_id] = self._by_id[user_id]
+                    if len(users) >= limit:
+                        break
+        return list(users.values())
+
+    def version(self) -> int:
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+
+# Statements are written with $n placeholders (PostgreSQL PREPARE syntax) and
+# rewritten to ?n for SQLite, so both backends share one definition.
+USER_COLUMNS = 'id, name, email'
+USER_STATEMENTS = {
+    'users_insert': (
+        '(text, text, text)',
+        f'INSERT INTO users (name, email, email_key) VALUES ($1, $2, $3) RETURNING {USER_COLUMNS}',
+    ),
+    'users_insert_ignore': (
+        '(text, text, text)',
+        f'INSERT INTO users (name, email, email_key) VALUES ($1, $2, $3)'
+        f' ON CONFLICT (email_key) DO NOTHING RETURNING {USER_COLUMNS}',
+    ),
+    'users_by_id': (
+        '(bigint)',
+        f'SELECT {USER_COLUMNS} FROM users WHERE id = $1',
+    ),
+    'users_by_email': (
+        '(text)',
+        f'SELECT {USER_COLUMNS} FROM users WHERE email_key = $1',
+    ),
+    'users_page': (
+        '(bigint, integer)',
+        f'SELECT {USER_COLUMNS} FROM users WHERE id > $1 ORDER BY id LIMIT $2',
+    ),
+    'users_all': (
+        '',
+        f'SELECT {USER_COLUMNS} FROM users ORDER BY id',
+    ),
+    'users_count': (
+        '',
+        'SELECT count(*) FROM users',
+    ),
+    'users_version': (
+        '',
+        'SELECT version FROM users_version WHERE id = 1',
+    ),
+    # Last statement of every transaction that adds users: the row lock orders
+    # the bumps by commit, so a reader never sees a version before its rows.
+    'users_version_bump': (
+        '',
+        'UPDATE users_version SET version = version + 1 WHERE id = 1',
+    ),
+    'users_search': (
+        '(text, text, text, integer)',
+        'SELECT u.id, u.name, u.email FROM user_search_terms t JOIN users u ON u.id = t.user_id'
+        ' WHERE t.field = $1 AND t.term >= $2 AND t.term < $3 ORDER BY t.term LIMIT $4',
+    ),
+}
+
+# A user can match through several of its terms, so fetch extra rows and dedupe
+SEARCH_OVERFETCH = 4
+
+
+def _user_terms(users: typ.Iterable[dict]) -> typ.List[typ.Tuple[str, str, int]]:
+    return [
+        (field, term, user['id'])
+        for user in users
+        for field in SEARCH_FIELDS
+        for term in search_terms(user[field])
+    ]
+
+
+def _row_to_user(row) -> dict:
+    return {'id': row[0], 'name': row[1], 'email': row[2]}
+
+
+def _batch_results(keys: typ.Sequence[typ.Optional[str]], inserted: typ.Sequence) -> typ.List[typ.Optional[dict]]:
+    """
+    Map rows returned by a batch insert back to input positions.
+
+    Keyed rows match by email key (the first occurrence wins, later ones get
+    None); rows with a blank email match in insertion order.
+    """
+    by_key = {row[3]: _row_to_user(row) for row in inserted if row[3] is not None}
+    unkeyed = iter(sorted((row for row in inserted if row[3] is None), key=lambda row: row[0]))
+    results = []
+    for key in keys:
+        if key is None:
+            results.append(_row_to_user(next(unkeyed)))
+        else:
+            results.append(by_key.pop(key, None))
+    return results
+
+
+class SQLUserStore(UserStore):
+    """
+    User store backed by a SQL database through a bounded connection pool.
+
+    The ``users`` table has an integer primary key and a unique index on the
+    normalised email (NULL for blank emails), so id and email lookups are index
+    seeks and the database enforces uniqueness across every worker process.
+    Search terms live in ``user_search_terms``, indexed on ``(field, term)`` and
+    written in the same transaction as the users they belong to. Users created
+    before that table existed are not searchable.
+    """
+
+    integrity_error: typ.Type[Exception] = Exception
+    schema: typ.Sequence[str] = ()
+
+    @staticmethod
+    def _is_duplicate(error: Exception) -> bool:
+        """Whether ``error`` (an ``integrity_error``) comes from the unique email index."""
+        raise NotImplementedError
+
+    def __init__(self, connect: typ.Callable[[], typ.Any], pool_size: int = DEFAULT_POOL_SIZE):
+        # Connections are opened lazily, so the app boots even while the database is still starting.
+        self.pool = ConnectionPool(connect, pool_size, setup=self._setup_connection)
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _setup_connection(self, conn):
+        with self._schema_lock:
+            if not self._schema_ready:
+                with conn:
+                    cursor = conn.cursor()
+                    for statement in self.schema:
+                        cursor.execute(statement)
+                self._schema_ready = True
+
+    def _execute(self, cursor, name: str, params: typ.Sequence = ()):
+        raise NotImplementedError
+
+    def _query(self, name: str, params: typ.Sequence = ()) -> list:
+        with self.pool.connection() as conn, conn:
+            cursor = conn.cursor()
+            self._execute(cursor, name, params)
+            return cursor.fetchall()
+
+    def _insert_terms(self, cursor, users: typ.Sequence[dict]):
+        raise NotImplementedError
+
+    def create(self, name: str, email: str) -> dict:
+        with self.pool.connection() as conn, conn:
+            cursor = conn.cursor()
+            try:
+                self._execute(cursor, 'users_insert', (name, email, _email_key(email) or None))
+            except self.integrity_error as e:
+                # Other constraint failures (e.g. NOT NULL) are not duplicates
+                if not self._is_duplicate(e):
+                    raise
+                raise DuplicateEmailError(email)
+            user = _row_to_user(cursor.fetchone())
+            self._insert_terms(cursor, [user])
+            self._execute(cursor, 'users_version_bump')
+        return user
+
+    def create_many(self, rows: typ.Sequence[typ.Tuple[str, str]]) -> typ.List[typ.Optional[dict]]:
+        # One transaction per batch: a single commit instead of one per row.
+        with self.pool.connection() as conn, conn:
+            cursor = conn.cursor()
+            results = []
+            for name, email in rows:
+                self._execute(cursor, 'users_insert_ignore', (name, email, _email_key(email) or None))
+                row = cursor.fetchone()
+                results.append(_row_to_user(row) if row else None)
+            created = [user for user in results if user is not None]
+            self._insert_terms(cursor, created)
+            if created:
+                self._execute(cursor, 'users_version_bump')
+            return results
+
+    def get(self, user_id: int) -> typ.Optional[dict]:
+        rows = self._query('users_by_id', (user_id,))
+        return _row_to_user(rows[0]) if rows else None
+
+    def get_by_email(self, email: str) -> typ.Optional[dict]:
+        key = _email_key(email)
+        if not key:
+            return None
+        rows = self._query('users_by_email', (key,))
+        return _row_to_user(rows[0]) if rows else None
+
+    def all(self) -> typ.List[dict]:
+        return [_row_to_user(row) for row in self._query('users_all')]
+
+    def page(self, after: int = 0, limit: int = 100) -> typ.List[dict]:
+        return [_row_to_user(row) for row in self._query('users_page', (after, limit))]
+
+    def search(self, field: str, prefix: str, limit: int = 20) -> typ.List[dict]:
+        rows = self._query('users_search', (field, prefix, prefix_upper_bound(prefix), limit * SEARCH_OVERFETCH))
+        users = {}
+        for row in rows:
+            users.setdefault(row[0], _row_to_user(row))
+            if len(users) >= limit:
+                break
+        return list(users.values())
+
+    def __len__(self) -> int:
+        return self._query('users_count')[0][0]
+
+    def version(self) -> int:
+        # A counter row bumped in every insert transaction. The highest id is not
+        # one: concurrent transactions can commit out of id order, and a lower id
+        # committing late would never change it.
+        return self._query('users_version')[0][0]
+
+    def ping(self):
+        with self.pool.connection() as conn, conn:
+            conn.cursor().execute('SELECT 1')
+
+    def close(self):
+        self.pool.close()
+
+
+class SQLiteUserStore(SQLUserStore):
+    """
+    SQLite backend, for running and testing without the postgres container.
+
+    The sqlite3 module keeps a per-connection cache of compiled statements, so
+    reusing pooled connections gives the same effect as explicit prepares.
+    """
+
+    integrity_error = sqlite3.IntegrityError
+
+    @staticmethod
+    def _is_duplicate(error: Exception) -> bool:
+        return str(error).startswith('UNIQUE constraint failed')
+
+    schema = (
+        'CREATE TABLE IF NOT EXISTS users ('
+        ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+        ' name TEXT NOT NULL,'
+        ' email TEXT NOT NULL,'
+        ' email_key TEXT)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS users_email_key_idx ON users (email_key)',
+        'CREATE TABLE IF NOT EXISTS user_search_terms ('
+        ' field TEXT NOT NULL,'
+        ' term TEXT NOT NULL,'
+        ' user_id INTEGER NOT NULL REFERENCES users (id))',
+        'CREATE INDEX IF NOT EXISTS user_search_terms_idx ON user_search_terms (field, term)',
+        'CREATE TABLE IF NOT EXISTS users_version ('
+        ' id INTEGER PRIMARY KEY CHECK (id = 1),'
+        ' version INTEGER NOT NULL)',
+        # Existing databases continue from their highest id, the version reported before this table
+        'INSERT OR IGNORE INTO users_version (id, version) SELECT 1, coalesce(max(id), 0) FROM users',
+    )
+    _statements = {
+        name: re.sub(r'\$(\d+)', r'?\1', sql) for name, (_, sql) in USER_STATEMENTS.items()
+    }
+
+    def _execute(self, cursor, name: str, params: typ.Sequence = ()):
+        cursor.execute(self._statements[name], params)
+
+    def _insert_terms(self, cursor, users: typ.Sequence[dict]):
+        cursor.executemany(
+            'INSERT INTO user_search_terms (field, term, user_id) VALUES (?, ?, ?)', _user_terms(users)
+        )
+
+
+class PostgresUserStore(SQLUserStore):
+    """
+    PostgreSQL backend.
+
+    Every statement is prepared once per pooled connection, so requests only
+    send ``EXECUTE`` with parameters and skip parsing and planning.
+    """
+
+    schema = (
+        # Serialise schema creation between workers booting at the same time
+        'SELECT pg_advisory_xact_lock(4242)',
+        'CREATE TABLE IF NOT EXISTS users ('
+        ' id BIGSERIAL PRIMARY KEY,'
+        ' name TEXT NOT NULL,'
+        ' email TEXT NOT NULL,'
+        ' email_key TEXT)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS users_email_key_idx ON users (email_key)',
+        # Byte-order collation so prefix ranges are correct whatever the database locale
+        'CREATE TABLE IF NOT EXISTS user_search_terms ('
+        ' field TEXT NOT NULL,'
+        ' term TEXT COLLATE "C" NOT NULL,'
+        ' user_id BIGINT NOT NULL REFERENCES users (id))',
+        'CREATE INDEX IF NOT EXISTS user_search_terms_idx ON user_search_terms (field, term)',
+        'CREATE TABLE IF NOT EXISTS users_version ('
+        ' id INTEGER PRIMARY KEY CHECK (id = 1),'
+        ' version BIGINT NOT NULL)',
+        # Existing databases continue from their highest id, the version reported before this table
+        'INSERT INTO users_version (id, version) SELECT 1, coalesce(max(id), 0) FROM users'
+        ' ON CONFLICT (id) DO NOTHING',
+    )
+
+    # Bulk inserts send the whole batch as arrays in a single round trip.
+    batch_statements = {
+        'users_insert_batch': (
+            '(text[], text[], text[])',
+            'INSERT INTO users (name, email, email_key)'
+            ' SELECT * FROM unnest($1::text[], $2::text[], $3::text[])'
+            f' ON CONFLICT (email_key) DO NOTHING RETURNING {USER_COLUMNS}, email_key',
+        ),
+        'users_terms_insert_batch': (
+            '(text[], text[], bigint[])',
+            'INSERT INTO user_search_terms (field, term, user_id)'
+            ' SELECT * FROM unnest($1::text[], $2::text[], $3::bigint[])',
+        ),
+    }
+
+    def __init__(self, connect: typ.Callable[[], typ.Any], pool_size: int = DEFAULT_POOL_SIZE):
+        import psycopg2
+
+        self.integrity_error = psycopg2.IntegrityError
+        super().__init__(connect, pool_size)
+
+    @staticmethod
+    def _is_duplicate(error: Exception) -> bool:
+        # 23505 is unique_violation
+        return getattr(error, 'pgcode', None) == '23505'
+
+    def _setup_connection(self, conn):
+        super()._setup_connection(conn)
+        with conn:
+            cursor = conn.cursor()
+            for name, (types, sql) in {**USER_STATEMENTS, **self.batch_statements}.items():
+                cursor.execute(f'PREPARE {name} {types} AS {sql}')
+
+    def _insert_terms(self, cursor, users: typ.Sequence[dict]):
+        terms = _user_terms(users)
+        if terms:
+            self._execute(cursor, 'users_terms_insert_batch', tuple(list(column) for column in zip(*terms)))
+
+    def create_many(self, rows: typ.Sequence[typ.Tuple[str, str]]) -> typ.List[typ.Optional[dict]]:
+        if not rows:
+            return []
+        keys = [_email_key(email) or None for _, email in rows]
+        with self.pool.connection() as conn, conn:
+            cursor = conn.cursor()
+            self._execute(cursor, 'users_insert_batch', (
+                [name for name, _ in rows],
+                [email for _, email in rows],
+                keys,
+            ))
+            inserted = cursor.fetchall()
+            self._insert_terms(cursor, [_row_to_user(row) for row in inserted])
+            if inserted:
+                self._execute(cursor, 'users_version_bump')
+        return _batch_results(keys, inserted)
+
+    def _execute(self, cursor, name: str, params: typ.Sequence = ()):
+        placeholders = ', '.join(['%s'] * len(params))
+        cursor.execute(f'EXECUTE {name} ({placeholders})' if params else f'EXECUTE {name}', params)
+
+
+def create_user_store(database_url: typ.Optional[str] = None, pool_size: int = DEFAULT_POOL_SIZE) -> UserStore:
+    """Pick the user store backend from ``DATABASE_URL``; no URL keeps users in memory."""
+    if not database_url:
+        store = InMemoryUserStore()
+        # Seed user kept from the original mock database
+        store.create('John Doe', '')
+        return store
+
+    scheme = get_scheme(database_url)
+    if scheme == 'sqlite':
+        return SQLiteUserStore(sqlite_connector(database_url), pool_size)
+    if scheme in ('postgres', 'postgresql'):
+        return PostgresUserStore(postgres_connector(database_url), pool_size)
+    raise ValueError(f'Unsupported DATABASE_URL scheme: {scheme}')
+
+
+def get_user_store() -> UserStore:
+    return current_app.extensions['user_store']
@@ -1,37 +1,245 @@
-from flask import Blueprint, jsonify, request
+import typing as typ
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from api.routes.users.models import DuplicateEmailError, get_user_store
+from api.routes.users.search import SEARCH_FIELDS
 
 users_blueprint = Blueprint('users', __name__)
 
-# Mock database (replace with actual database in production)
-users = [
-    {
-        'id': 1,
-        'name': 'John Doe',
-        'email': ''
-    },
-]
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NDJSON_MIMETYPE = 'application/x-ndjson'
+MAX_BULK_BATCH_SIZE = 10000
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+def validate_user(data) -> typ.Optional[str]:
+    if not isinstance(data, dict):
+        return 'User must be a JSON object'
+    if 'name' not in data:
+        return 'Name is required'
+    if 'email' not in data:
+        return 'Email is required'
+    if not isinstance(data['name'], str):
+        return 'Name must be a string'
+    if not isinstance(data['email'], str):
+        return 'Email must be a string'
+    return None
+
+# Request parsing and response building shared with async_routes.py; errors
+# are returned as messages so each app answers them with its own jsonify.
+
+def _int_arg(args, name: str, default: int) -> typ.Tuple[int, typ.Optional[str]]:
+    # args.get(type=int) silently falls back to the default for a malformed value
+    value = args.get(name)
+    if value is None:
+        return default, None
+    try:
+        return int(value), None
+    except ValueError:
+        return default, f'{name} must be an integer'
+
+def parse_page_args(args) -> typ.Tuple[int, int, bool, typ.Optional[str]]:
+    """``after``, ``limit``, whether the client asked for a page, and a validation error."""
+    after, error = _int_arg(args, 'after', 0)
+    limit, limit_error = _int_arg(args, 'limit', DEFAULT_PAGE_SIZE)
+    paginated = 'limit' in args or 'after' in args
+    if error or limit_error:
+        return after, limit, paginated, error or limit_error
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return after, limit, paginated, f'limit must be between 1 and {MAX_PAGE_SIZE}'
+    return after, limit, paginated, None
+
+def users_etag(version: int, after: int, limit: int, paginated: bool) -> str:
+    return f'users-{version}-{after}-{limit}' if paginated else f'users-{version}'
+
+def page_body(users: typ.List[dict], limit: int) -> dict:
+    next_cursor = users[-1]['id'] if len(users) == limit else None
+    return {'users': users, 'next': next_cursor}
+
+def parse_search_args(args) -> typ.Tuple[str, typ.List[str], int, typ.Optional[str]]:
+    """The lowercased query, the fields to search, ``limit``, and a validation error."""
+    query = args.get('q', '').strip().lower()
+    field = args.get('field')
+    limit, error = _int_arg(args, 'limit', DEFAULT_SEARCH_LIMIT)
+    if not query:
+        return query, [], limit, 'q is required'
+    if error:
+        return query, [], limit, error
+    if field is not None and field not in SEARCH_FIELDS:
+        return query, [], limit, f"field must be one of {', '.join(SEARCH_FIELDS)}"
+    if not 1 <= limit <= MAX_SEARCH_LIMIT:
+        return query, [], limit, f'limit must be between 1 and {MAX_SEARCH_LIMIT}'
+    return query, [field] if field else list(SEARCH_FIELDS), limit, None
+
+def parse_batch_size(args, default: int) -> typ.Tuple[int, typ.Optional[str]]:
+    batch_size, error = _int_arg(args, 'batch_size', default)
+    if error:
+        return batch_size, error
+    if not 1 <= batch_size <= MAX_BULK_BATCH_SIZE:
+        return batch_size, f'batch_size must be between 1 and {MAX_BULK_BATCH_SIZE}'
+    return batch_size, None
+
+class BulkCreate:
+    """
+    Validation, batching and per-row results of a bulk create.
+
+    ``add`` validates a row and queues it; once it reports a full batch the
+    caller writes ``batch`` with the store's ``create_many`` and passes the
+    users to ``record``.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self.results: typ.List[typ.Optional[dict]] = []
+        self.batch: typ.List[typ.Tuple[str, str]] = []
+        self._indexes: typ.List[int] = []
+
+    def add(self, row, error: typ.Optional[str] = None) -> bool:
+        """Validate and queue ``row``; returns True when the batch is full."""
+        index = len(self.results)
+        error = error or validate_user(row)
+        if error:
+            self.results.append({'index': index, 'status': 400, 'error': error})
+            return False
+        self.results.append(None)
+        self.batch.append((row['name'], row['email']))
+        self._indexes.append(index)
+        return len(self.batch) >= self.batch_size
+
+    def record(self, users: typ.Sequence[typ.Optional[dict]]):
+        """Store the results of writing ``batch`` and start a new one."""
+        for index, user in zip(self._indexes, users):
+            if user is None:
+                self.results[index] = {'index': index, 'status': 409, 'error': 'Email already registered'}
+            else:
+                self.results[index] = {'index': index, 'status': 201, 'user': user}
+        self.batch = []
+        self._indexes = []
+
+    def body(self) -> dict:
+        created = sum(1 for result in self.results if result['status'] == 201)
+        return {'created': created, 'failed': len(self.results) - created, 'results': self.results}
+
+def _wants_ndjson() -> bool:
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+def _stream_ndjson(store, after: int, dumps):
+    for user in store.iter_users(after):
+        yield dumps(user) + '\n'
 
 @users_blueprint.route('/users', methods=['GET'])
 def get_users():
-    return jsonify(users), 200
+    store = get_user_store()
+    email = request.args.get('email')
+    if email is not None:
+        user = store.get_by_email(email)
+        return jsonify([user] if user else []), 200
+
+    after, limit, paginated, error = parse_page_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    if _wants_ndjson():
+        return Response(_stream_ndjson(store, after, current_app.json.dumps), mimetype=NDJSON_MIMETYPE), 200
+
+    # Answer revalidations from the store version alone, before any user is read
+    etag = users_etag(store.version(), after, limit, paginated)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    if paginated:
+        response = jsonify(page_body(store.page(after, limit), limit))
+    else:
+        response = jsonify(store.all())
+    response.set_etag(etag)
+    return response, 200
+
+@users_blueprint.route('/users/search', methods=['GET'])
+def search_users():
+    """
+    Autocomplete users by name or email.
+
+    Matches values with a word starting with ``q`` (case-insensitive). ``field``
+    restricts the search to ``name`` or ``email``; both are searched by default.
+    """
+    query, fields, limit, error = parse_search_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    store = get_user_store()
+    users = {}
+    for search_field in fields:
+        for user in store.search(search_field, query, limit - len(users)):
+            users.setdefault(user['id'], user)
+        if len(users) >= limit:
+            break
+    return jsonify(list(users.values())), 200
+
+@users_blueprint.route('/users/<int:user_id>', methods=['GET'])
+def get_user(user_id):
+    user = get_user_store().get(user_id)
+    if user is None:
+        return jsonify({'error': 'User not found'}), 404
+    return jsonify(user), 200
 
 @users_blueprint.route('/user', methods=['POST'])
 def create_user():
     if not request.json:
         return jsonify({'error': 'No request body'}), 400
-    
+
     data = request.get_json()
-    
-    if 'name' not in data:
-        return jsonify({'error': 'Name is required'}), 400
-    if 'email' not in data:
-        return jsonify({'error': 'Email is required'}), 400
-    
-    new_user = {
-        'id': len(users) + 1,
-        'name': data['name'],
-        'email': data['email']
-    }
-    users.append(new_user)
+
+    error = validate_user(data)
+    if error:
+        return jsonify({'error': error}), 400
+
+    try:
+        new_user = get_user_store().create(data['name'], data['email'])
+    except DuplicateEmailError:
+        return jsonify({'error': 'Email already registered'}), 409
     return jsonify(new_user), 201
-    
\ No newline at end of file
+
+def iter_ndjson(stream, loads):
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield loads(line), None
+        except ValueError:
+            yield None, 'Invalid JSON line'
+
+@users_blueprint.route('/users/bulk', methods=['POST'])
+def bulk_create_users():
+    """
+    Create many users from a JSON array or an NDJSON body.
+
+    Rows are validated as they are read and written in batches of
+    ``batch_size`` (one store write per batch). The response carries one
+    result per input row, in order.
+    """
+    batch_size, error = parse_batch_size(request.args, current_app.config['BULK_BATCH_SIZE'])
+    if error:
+        return jsonify({'error': error}), 400
+
+    if request.mimetype == NDJSON_MIMETYPE:
+        # Read line by line so the raw body is never buffered whole
+        rows = iter_ndjson(request.stream, current_app.json.loads)
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            return jsonify({'error': 'Request body must be a JSON array or NDJSON'}), 400
+        rows = ((row, None) for row in data)
+
+    store = get_user_store()
+    bulk = BulkCreate(batch_size)
+    for row, error in rows:
+        if bulk.add(row, error):
+            bulk.record(store.create_many(bulk.batch))
+    if bulk.batch:
+        bulk.record(store.create_many(bulk.batch))
+    return jsonify(bulk.body()), 200
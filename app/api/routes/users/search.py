@@ -0,0 +1,84 @@
+import bisect
+import re
+import typing as typ
+
+SEARCH_FIELDS = ('name', 'email')
+
+# Word boundaries inside names and emails
+_BOUNDARY = re.compile(r'[\s@._+-]+')
+
+
+def search_terms(value: str) -> typ.List[str]:
+    """
+    Return the index terms for a field value.
+
+    The whole lowercased value is a term, and so is every suffix starting at a
+    word boundary, so a prefix query also matches words inside the value:
+    "doe" finds "John Doe" and "example" finds "jane@example.com".
+    """
+    value = value.strip().lower()
+    if not value:
+        return []
+    terms = [value]
+    for match in _BOUNDARY.finditer(value):
+        suffix = value[match.end():]
+        if suffix and suffix not in terms:
+            terms.append(suffix)
+    return terms
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Smallest string sorting after every string that starts with ``prefix``."""
+    return prefix + '\U0010ffff'
+
+
+class SortedIndex:
+    """
+    Sorted ``(term, user_id)`` pairs, split into blocks of bounded size.
+
+    Inserting only shifts one block instead of the whole index, so keeping it
+    up to date costs O(log n + block size) per term even at millions of users,
+    and a prefix query is a binary search followed by a short forward scan.
+    Not thread-safe: callers serialise access.
+    """
+
+    BLOCK_SIZE = 1000
+
+    def __init__(self):
+        self._blocks: typ.List[typ.List[typ.Tuple[str, int]]] = []
+        self._maxes: typ.List[typ.Tuple[str, int]] = []
+
+    def add(self, term: str, user_id: int):
+        item = (term, user_id)
+        if not self._blocks:
+            self._blocks.append([item])
+            self._maxes.append(item)
+            return
+        pos = bisect.bisect_left(self._maxes, item)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._blocks[pos].append(item)
+            self._maxes[pos] = item
+        else:
+            bisect.insort(self._blocks[pos], item)
+        block = self._blocks[pos]
+        if len(block) > 2 * self.BLOCK_SIZE:
+            tail = block[self.BLOCK_SIZE:]
+            del block[self.BLOCK_SIZE:]
+            self._blocks.insert(pos + 1, tail)
+            self._maxes[pos] = block[-1]
+            self._maxes.insert(pos + 1, tail[-1])
+
+    def prefix(self, prefix: str) -> typ.Iterator[typ.Tuple[str, int]]:
+        """Yield pairs whose term starts with ``prefix``, in term order."""
+        start = (prefix,)
+        pos = bisect.bisect_left(self._maxes, start)
+        if pos == len(self._maxes):
+            return
+        index = bisect.bisect_left(self._blocks[pos], start)
+        for block in self._blocks[pos:]:
+            for term, user_id in block[index:]:
+                if not term.startswith(prefix):
+                    return
+                yield term, user_id
+            index = 0
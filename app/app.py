@@ -1,16 +1,82 @@
+import os
+
 from flask import Flask, jsonify
+from werkzeug.middleware.proxy_fix import ProxyFix
 
+from api.routes.users.models import create_user_store
+from api.routes.debug.routes import debug_blueprint
+from api.routes.metrics.routes import metrics_blueprint
+from core.auth import check_secret, token_cache_metrics
+from core.health import HealthMonitor
+from core.json_provider import create_json_provider
+from core.load_shedding import AdaptiveConcurrencyLimiter, ClientRateLimiter, LoadShedder
+from core.profiling import ProfileStore, RequestProfiler
+from core.request_logging import RequestLogging
+from core.metrics import RequestMetrics
 from api.routes.users.routes import users_blueprint
 from api.routes.health_check.routes import health_check_blueprint
 
 def create_app() -> Flask:
     app = Flask(__name__)
     app.config["HEALTHY"] = True
+    app.config["JSON_PROVIDER"] = os.getenv("JSON_PROVIDER", "auto")
+    app.json = create_json_provider(app)
+    app.config["LOG_LEVEL"] = os.getenv("LOG_LEVEL", "INFO")
+    app.config["LOG_QUEUE_SIZE"] = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    request_logging = RequestLogging(app.config["LOG_LEVEL"], app.config["LOG_QUEUE_SIZE"])
+    request_logging.init_app(app)
+    app.config["DATABASE_URL"] = os.getenv("DATABASE_URL")
+    app.config["DATABASE_POOL_SIZE"] = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+    app.config["BULK_BATCH_SIZE"] = int(os.getenv("BULK_BATCH_SIZE", "500"))
+    app.extensions["user_store"] = create_user_store(
+        app.config["DATABASE_URL"], app.config["DATABASE_POOL_SIZE"]
+    )
+    app.config["HEALTH_CHECK_INTERVAL"] = float(os.getenv("HEALTH_CHECK_INTERVAL", "15"))
+    health_monitor = HealthMonitor(app.config["HEALTH_CHECK_INTERVAL"])
+    health_monitor.register("database", app.extensions["user_store"].ping)
+    health_monitor.register("auth", check_secret)
+    app.extensions["health_monitor"] = health_monitor
+    metrics = RequestMetrics()
+    metrics.register_collector(token_cache_metrics)
+    metrics.register_collector(request_logging.metrics)
+    metrics.init_app(app)
+
+    # Number of reverse proxies in front of the app whose X-Forwarded-For is trusted
+    app.config["TRUSTED_PROXIES"] = int(os.getenv("TRUSTED_PROXIES", "0"))
+    if app.config["TRUSTED_PROXIES"] > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["TRUSTED_PROXIES"])
+    app.config["RATE_LIMIT_PER_SECOND"] = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))
+    app.config["RATE_LIMIT_BURST"] = float(os.getenv("RATE_LIMIT_BURST", "20"))
+    app.config["CONCURRENCY_LIMIT"] = int(os.getenv("CONCURRENCY_LIMIT", "64"))
+    app.config["CONCURRENCY_LIMIT_MAX"] = int(os.getenv("CONCURRENCY_LIMIT_MAX", "256"))
+    app.config["TARGET_LATENCY"] = float(os.getenv("TARGET_LATENCY", "1.0"))
+    rate_limiter = None
+    if app.config["RATE_LIMIT_PER_SECOND"] > 0:
+        rate_limiter = ClientRateLimiter(app.config["RATE_LIMIT_PER_SECOND"], app.config["RATE_LIMIT_BURST"])
+    load_shedder = LoadShedder(
+        AdaptiveConcurrencyLimiter(
+            app.config["CONCURRENCY_LIMIT"],
+            max_limit=app.config["CONCURRENCY_LIMIT_MAX"],
+            target_latency=app.config["TARGET_LATENCY"],
+        ),
+        rate_limiter,
+        exempt_endpoints=("health_check.health_check", "metrics.metrics"),
+    )
+    load_shedder.init_app(app)
+    metrics.register_collector(load_shedder.metrics)
+
+    app.config["PROFILE_SAMPLE_RATE"] = int(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    app.config["PROFILE_MAX_STORED"] = int(os.getenv("PROFILE_MAX_STORED", "50"))
+    RequestProfiler(
+        ProfileStore(app.config["PROFILE_MAX_STORED"]), app.config["PROFILE_SAMPLE_RATE"]
+    ).init_app(app)
     return app
 
 def register_blueprints(app: Flask):
     app.register_blueprint(users_blueprint)
     app.register_blueprint(health_check_blueprint)
+    app.register_blueprint(metrics_blueprint)
+    app.register_blueprint(debug_blueprint)
     
 app = create_app()
 register_blueprints(app)
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+ASGI entry point: async variants of the users and health check endpoints.
+
+Requests waiting on the database or a slow network are suspended on the event
+loop rather than pinning a worker thread, so one process can hold thousands of
+concurrent connections. Serve it with Hypercorn:
+
+    hypercorn asgi:app --bind 0.0.0.0:5000
+
+The WSGI middleware (metrics, load shedding, profiling, request logging) is
+registered on the Flask app in app.py and is not part of this entry point.
+"""
+import asyncio
+import os
+
+from quart import Quart
+
+from api.routes.health_check.async_routes import health_check_async_blueprint
+from api.routes.users.async_models import create_async_user_store
+from api.routes.users.async_routes import users_async_blueprint
+from core.auth import check_secret
+from core.health import HealthMonitor
+from core.json_provider import create_json_provider
+
+PROBE_TIMEOUT = 5.0
+
+def create_asgi_app() -> Quart:
+    app = Quart(__name__)
+    app.config["HEALTHY"] = True
+    app.config["JSON_PROVIDER"] = os.getenv("JSON_PROVIDER", "auto")
+    app.json = create_json_provider(app)
+    app.config["DATABASE_URL"] = os.getenv("DATABASE_URL")
+    app.config["DATABASE_POOL_SIZE"] = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+    app.config["BULK_BATCH_SIZE"] = int(os.getenv("BULK_BATCH_SIZE", "500"))
+    store = create_async_user_store(app.config["DATABASE_URL"], app.config["DATABASE_POOL_SIZE"])
+    app.extensions["user_store"] = store
+
+    app.config["HEALTH_CHECK_INTERVAL"] = float(os.getenv("HEALTH_CHECK_INTERVAL", "15"))
+    health_monitor = HealthMonitor(app.config["HEALTH_CHECK_INTERVAL"])
+    health_monitor.register("auth", check_secret)
+    app.extensions["health_monitor"] = health_monitor
+
+    @app.before_serving
+    async def open_store():
+        await store.open()
+        loop = asyncio.get_running_loop()
+
+        # Probes run on the monitor's thread; hand the async ping to the serving loop
+        def ping_database():
+            asyncio.run_coroutine_threadsafe(store.ping(), loop).result(PROBE_TIMEOUT)
+
+        health_monitor.register("database", ping_database)
+        # Take the first snapshot off the loop so no request ever probes inline
+        await loop.run_in_executor(None, health_monitor.run_probes)
+
+    @app.after_serving
+    async def close_store():
+        await store.close()
+
+    return app
+
+def register_async_blueprints(app: Quart):
+    app.register_blueprint(users_async_blueprint)
+    app.register_blueprint(health_check_async_blueprint)
+
+app = create_asgi_app()
+register_async_blueprints(app)
@@ -0,0 +1,258 @@
+"""
+Throughput and latency benchmarks for the Flask API.
+
+The app is built through ``create_app()``/``register_blueprints()`` and
+driven with the Flask test client, or over HTTP against a local server with
+``--server``. Each store size is seeded in bulk before its scenarios run.
+Run from the app directory:
+
+    python -m benchmarks.api --sizes 10 1000 100000 --output results.json
+    python -m benchmarks.api --baseline previous.json --fail-over 20
+"""
+import argparse
+import collections
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import typing as typ
+from concurrent.futures import ThreadPoolExecutor
+
+# Keep per-request access lines out of the benchmark output unless asked for
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from flask import Flask, jsonify
+from werkzeug.serving import make_server
+
+from app import create_app, register_blueprints
+from core.auth import generate_jwt, get_user_id_from_token, validate_token
+
+SEED_BATCH_SIZE = 10000
+BULK_ROWS = 1000
+PROTECTED_PATH = '/bench/protected'
+
+# name -> (method, path, rows per request); paths may use {user_id}.
+# Writes come last so they do not grow the store under the read scenarios.
+SCENARIOS = {
+    'list_users': ('GET', '/users', 0),
+    'list_users_page': ('GET', '/users?limit=100&after={user_id}', 0),
+    'get_user': ('GET', '/users/{user_id}', 0),
+    'find_user_by_email': ('GET', '/users?email=user{user_id}@bench.example', 0),
+    'search_users': ('GET', '/users/search?q=user{user_id}&field=email', 0),
+    'health_check': ('GET', '/health_check', 0),
+    'deep_health_check': ('GET', '/health_check?deep=1', 0),
+    'jwt_protected': ('GET', PROTECTED_PATH, 0),
+    'create_user': ('POST', '/user', 1),
+    'bulk_create_users': ('POST', '/users/bulk', BULK_ROWS),
+}
+
+
+def build_app(size: int) -> Flask:
+    app = create_app()
+    register_blueprints(app)
+
+    # The API has no token-protected route yet; mount one so the JWT path is measured.
+    @validate_token
+    def protected():
+        return jsonify({'user_id': get_user_id_from_token()})
+
+    app.add_url_rule(PROTECTED_PATH, 'bench_protected', protected)
+
+    store = app.extensions['user_store']
+    for start in range(1, size + 1, SEED_BATCH_SIZE):
+        stop = min(start + SEED_BATCH_SIZE, size + 1)
+        store.create_many([(f'User {i}', f'user{i}@bench.example') for i in range(start, stop)])
+    return app
+
+
+class TestClientDriver:
+    def __init__(self, app: Flask):
+        self.app = app
+
+    def request(self, method: str, path: str, headers: dict, body: typ.Optional[bytes]) -> int:
+        # One client per call keeps the driver thread-safe
+        response = self.app.test_client().open(path, method=method, headers=headers, data=body)
+        response.get_data()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class ServerDriver:
+    """Drives a werkzeug server started on a free local port."""
+
+    def __init__(self, app: Flask):
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def request(self, method: str, path: str, headers: dict, body: typ.Optional[bytes]) -> int:
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        finally:
+            conn.close()
+
+    def close(self):
+        self.server.shutdown()
+
+
+def percentile(sorted_values: typ.List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(driver, name: str, size: int, requests: int, concurrency: int, token: str) -> dict:
+    method, path_template, rows = SCENARIOS[name]
+    emails = itertools.count()
+    user_ids = itertools.cycle(range(1, max(size, 1) + 1))
+    lock = threading.Lock()
+
+    def next_request():
+        headers = {'Authorization': f'Token {token}'}
+        body = None
+        with lock:
+            user_id = next(user_ids)
+            if rows:
+                first = next(emails)
+                for _ in range(rows - 1):
+                    next(emails)
+        if rows == 1:
+            body = json.dumps({'name': 'Bench', 'email': f'new{first}-{os.getpid()}@bench.example'}).encode()
+        elif rows:
+            body = json.dumps([
+                {'name': 'Bench', 'email': f'new{first + i}-{os.getpid()}@bench.example'} for i in range(rows)
+            ]).encode()
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        return path_template.format(user_id=user_id), headers, body
+
+    def one(_):
+        path, headers, body = next_request()
+        started = time.perf_counter()
+        status = driver.request(method, path, headers, body)
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in outcomes)
+    statuses = collections.Counter(status for _, status in outcomes)
+    # 4xx answers (rate limited, duplicate, invalid) are fast but did no work
+    errors = sum(count for status, count in statuses.items() if not (200 <= status < 300 or status == 304))
+    result = {
+        'scenario': name,
+        'users': size,
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput_rps': round((requests - errors) / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+    if rows > 1:
+        result['rows_per_second'] = round((requests - errors) * rows / elapsed, 2)
+    return result
+
+
+def compare(results: typ.List[dict], baseline_path: str, fail_over: typ.Optional[float]) -> bool:
+    """Print changes against a previous run; return False if any p95 regressed past ``fail_over`` percent."""
+    with open(baseline_path) as f:
+        baseline = {(r['scenario'], r['users']): r for r in json.load(f)['results']}
+    ok = True
+    for result in results:
+        previous = baseline.get((result['scenario'], result['users']))
+        if previous is None or not previous['p95_ms'] or not previous['throughput_rps']:
+            continue
+        p95_change = (result['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100
+        rps_change = (result['throughput_rps'] - previous['throughput_rps']) / previous['throughput_rps'] * 100
+        flag = ''
+        if fail_over is not None and p95_change > fail_over:
+            flag = '  REGRESSION'
+            ok = False
+        print(f"{result['scenario']:>20} {result['users']:>8}  p95 {p95_change:+7.1f}%  rps {rps_change:+7.1f}%{flag}")
+    return ok
+
+
+def git_revision() -> typ.Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Flask API benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000], help='Users in the store, up to 1000000')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=500, help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent client threads')
+    parser.add_argument('--full-list-max', type=int, default=100000,
+                        help='Skip the unpaginated list_users scenario above this store size')
+    parser.add_argument('--server', action='store_true', help='Drive a local HTTP server instead of the test client')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Previous JSON results to compare against')
+    parser.add_argument('--fail-over', type=float, help='Exit non-zero if any p95 regresses by more than this percent')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    token = generate_jwt('bench')
+    results = []
+    for size in args.sizes:
+        app = build_app(size)
+        driver = ServerDriver(app) if args.server else TestClientDriver(app)
+        try:
+            for name in args.scenarios:
+                if name == 'list_users' and size > args.full_list_max:
+                    continue
+                result = run_scenario(driver, name, size, args.requests, args.concurrency, token)
+                results.append(result)
+                print(
+                    f"{name:>20} {size:>8} users  {result['throughput_rps']:>9.1f} req/s"
+                    f"  p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms"
+                    + (f"  {result['rows_per_second']:.0f} rows/s" if 'rows_per_second' in result else '')
+                    + (f"  {result['errors']} errors {result['statuses']}" if result['errors'] else '')
+                )
+        finally:
+            driver.close()
+            app.extensions['user_store'].close()
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'driver': 'server' if args.server else 'test_client',
+            'json_provider': type(app.json).__name__,
+            'timestamp': time.time(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline and not compare(results, args.baseline, args.fail_over):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
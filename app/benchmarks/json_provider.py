@@ -0,0 +1,80 @@
+"""
+Compare Flask's stdlib JSON provider with the orjson provider on users payloads.
+
+Run from the app directory:
+
+    python -m benchmarks.json_provider --sizes 100 10000 100000
+"""
+import argparse
+import json
+import time
+import typing as typ
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from core.json_provider import OrjsonProvider, orjson
+
+
+def make_users(count: int) -> typ.List[dict]:
+    return [{'id': i, 'name': f'User {i}', 'email': f'user{i}@example.com'} for i in range(1, count + 1)]
+
+
+def best_of(func: typ.Callable[[], typ.Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def bench_provider(provider, users: typ.List[dict], repeat: int) -> dict:
+    app = provider._app
+    encoded = provider.dumps(users)
+    with app.app_context():
+        response_s = best_of(lambda: provider.response(users).get_data(), repeat)
+    return {
+        'dumps_s': best_of(lambda: provider.dumps(users), repeat),
+        'loads_s': best_of(lambda: provider.loads(encoded), repeat),
+        'response_s': response_s,
+        'bytes': len(encoded.encode()),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='JSON provider benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 100000], help='Users per payload')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, best is kept')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    app = Flask(__name__)
+    providers = {'stdlib': DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers['orjson'] = OrjsonProvider(app)
+    else:
+        print('orjson is not installed, only the stdlib provider is measured')
+
+    results = []
+    for size in args.sizes:
+        users = make_users(size)
+        for name, provider in providers.items():
+            result = {'provider': name, 'users': size, **bench_provider(provider, users, args.repeat)}
+            results.append(result)
+            print(
+                f"{name:>7} {size:>9} users  dumps {result['dumps_s'] * 1000:9.2f} ms"
+                f"  loads {result['loads_s'] * 1000:9.2f} ms"
+                f"  response {result['response_s'] * 1000:9.2f} ms"
+            )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
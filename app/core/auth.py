@@ -1,13 +1,21 @@
 import typing as typ
+import hashlib
 import os
+import threading
+import time
 import jwt
-from flask import request
+from collections import OrderedDict
+from flask import g, request
+from functools import wraps
 from datetime import datetime, timedelta, timezone
 
 ISSUER = "aidays-app"
 SECRET_KEY = os.getenv("SECRET_KEY", "secret")
 OVERRIDE_TOKEN_EXPIRATION = os.getenv("OVERRIDE_TOKEN_EXPIRATION", "FALSE").upper()
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
 
+DecodeResult = typ.Tuple[bool, typ.Union[dict, str]]
 
 
 def generate_jwt(
@@ -24,10 +32,100 @@ def generate_jwt(
     return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
 
 
-@lru_cache()
-def _decode_jwt(token: str) -> typ.Tuple[bool, typ.Union[dict, str]]:
+class TokenCache:
+    """
+    Bounded cache of successful token verifications.
+
+    Entries are keyed by the SHA-256 digest of the token, so raw tokens are
+    never kept in memory, and live at most ``ttl`` seconds and never past the
+    token's own ``exp``. The least recently used entry is evicted once
+    ``maxsize`` is reached. Failed verifications are not cached.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, typ.Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> typ.Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, decoded = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return decoded
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def put(self, token: str, decoded: dict):
+        expires_at = time.time() + self.ttl
+        if "exp" in decoded:
+            expires_at = min(expires_at, float(decoded["exp"]))
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, decoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+token_cache = TokenCache()
+
+
+def token_cache_metrics():
+    """Metrics collector exposing the token cache counters."""
+    stats = token_cache.stats()
+    yield "auth_token_cache_size", "gauge", "Cached token verifications.", stats["size"]
+    yield "auth_token_cache_hits_total", "counter", "Token verifications served from cache.", stats["hits"]
+    yield "auth_token_cache_misses_total", "counter", "Token verifications that missed the cache.", stats["misses"]
+    yield "auth_token_cache_evictions_total", "counter", "Cache entries evicted by size or expiry.", stats["evictions"]
+
+
+def check_secret() -> typ.Optional[str]:
+    """Health probe: the signing secret is set and round-trips a token."""
+    if not SECRET_KEY:
+        raise RuntimeError("SECRET_KEY is empty")
+    token = jwt.encode({"iss": ISSUER}, SECRET_KEY, algorithm="HS256")
+    jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    if SECRET_KEY == "secret":
+        return "using the default SECRET_KEY"
+    return None
+
+
+def _decode_jwt(token: str) -> DecodeResult:
+    decoded = token_cache.get(token)
+    if decoded is not None:
+        return True, decoded
     try:
         decoded = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        token_cache.put(token, decoded)
         return True, decoded
     except (
         jwt.ExpiredSignatureError,
@@ -45,18 +143,34 @@ def _get_token_from_request() -> typ.Optional[str]:
         return None
 
     # Authorization: Token <token>
-    return encoded_token.split(" ")[1]
+    parts = encoded_token.split(" ")
+    if len(parts) < 2:
+        return None
+    return parts[1]
+
+
+def _decode_request_token() -> typ.Optional[DecodeResult]:
+    """Decode the current request's token once and reuse the result for the rest of the request."""
+    if "token_decode" not in g:
+        encoded_token = _get_token_from_request()
+        g.token_decode = _decode_jwt(encoded_token) if encoded_token else None
+    return g.token_decode
+
+
+def request_is_authenticated() -> bool:
+    result = _decode_request_token()
+    return result is not None and result[0]
 
 
 def validate_token(func):
     @wraps(func)
     def wrapper(*args, **kwds):
 
-        encoded_token = _get_token_from_request()
-        if not encoded_token:
+        result = _decode_request_token()
+        if result is None:
             return {"error": "No token provided."}, 401
 
-        is_valid, decoded = _decode_jwt(encoded_token)
+        is_valid, decoded = result
         if not is_valid:
             return {"error": decoded}, 401
 
@@ -66,7 +180,10 @@ def validate_token(func):
 
 
 def get_user_id_from_token() -> typ.Optional[str]:
-    is_valid, decoded = _decode_jwt(_get_token_from_request())
+    result = _decode_request_token()
+    if result is None:
+        return None
+    is_valid, decoded = result
     if is_valid:
         return decoded.get("user_id")
     return None
\ No newline at end of file
@@ -0,0 +1,109 @@
+import contextlib
+import queue
+import sqlite3
+import threading
+import typing as typ
+from urllib.parse import urlparse
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 10.0
+DEFAULT_CONNECT_TIMEOUT = 5
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when no pooled connection frees up within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of DB-API connections.
+
+    Connections are opened lazily, so a pool created before gunicorn forks its
+    workers never shares a socket between processes. At most ``size``
+    connections exist at once; callers beyond that wait up to ``timeout``
+    seconds for one to be returned. Idle connections are reused LIFO so the
+    hottest connection stays warm. ``setup`` runs once on every new connection,
+    which is where per-session work such as preparing statements belongs.
+    """
+
+    def __init__(
+        self,
+        connect: typ.Callable[[], typ.Any],
+        size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_POOL_TIMEOUT,
+        setup: typ.Optional[typ.Callable[[typ.Any], None]] = None,
+    ):
+        self._connect = connect
+        self._setup = setup
+        self._timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: "queue.LifoQueue[typ.Any]" = queue.LifoQueue()
+        self.size = size
+
+    @contextlib.contextmanager
+    def connection(self):
+        if not self._slots.acquire(timeout=self._timeout):
+            raise PoolTimeout(f"No database connection available after {self._timeout}s")
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+            yield conn
+        finally:
+            # psycopg2 flags connections that lost their server; never hand those out again
+            if conn is not None and not getattr(conn, "closed", False):
+                self._idle.put(conn)
+            self._slots.release()
+
+    def _open(self):
+        conn = self._connect()
+        if self._setup is not None:
+            try:
+                self._setup(conn)
+            except BaseException:
+                conn.close()
+                raise
+        return conn
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+
+
+def sqlite_connector(database_url: str) -> typ.Callable[[], sqlite3.Connection]:
+    """Build a connect function for ``sqlite:///relative.db`` or ``sqlite:////abs/path.db`` URLs."""
+    path = database_url[len("sqlite:///"):] if database_url.startswith("sqlite:///") else ""
+    if path in ("", ":memory:"):
+        # A plain :memory: database is private to one connection; share it across the pool.
+        path, uri = "file:aidays-app?mode=memory&cache=shared", True
+    else:
+        uri = False
+
+    def connect() -> sqlite3.Connection:
+        # Pooled connections move between request threads, hence check_same_thread=False.
+        conn = sqlite3.connect(path, uri=uri, timeout=DEFAULT_POOL_TIMEOUT, check_same_thread=False)
+        if not uri:
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    return connect
+
+
+def postgres_connector(database_url: str, connect_timeout: int = DEFAULT_CONNECT_TIMEOUT) -> typ.Callable[[], typ.Any]:
+    import psycopg2
+
+    def connect():
+        # Without a timeout an unreachable server stalls the caller for the OS TCP timeout
+        return psycopg2.connect(database_url, connect_timeout=connect_timeout)
+
+    return connect
+
+
+def get_scheme(database_url: str) -> str:
+    return urlparse(database_url).scheme.split("+")[0]
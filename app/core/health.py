@@ -0,0 +1,74 @@
+import threading
+import time
+import typing as typ
+
+# A probe returns None (or a short detail string) when healthy and raises otherwise.
+Probe = typ.Callable[[], typ.Optional[str]]
+
+DEFAULT_INTERVAL = 15.0
+
+
+class HealthMonitor:
+    """
+    Runs dependency probes in a background thread and caches the outcome.
+
+    Requests only read the last snapshot, so any number of pollers costs a dict
+    copy rather than a round trip to every dependency. The refresher thread is
+    started on first use, which keeps it out of the gunicorn master process and
+    out of apps that never serve a deep health check.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self._probes: typ.Dict[str, Probe] = {}
+        self._lock = threading.Lock()
+        self._snapshot: typ.Optional[dict] = None
+        self._thread: typ.Optional[threading.Thread] = None
+
+    def register(self, name: str, probe: Probe):
+        self._probes[name] = probe
+
+    def run_probes(self) -> dict:
+        checks = {}
+        for name, probe in self._probes.items():
+            started = time.perf_counter()
+            try:
+                detail = probe()
+                check = {"status": "ok"}
+                if detail:
+                    check["detail"] = detail
+            except Exception as e:
+                check = {"status": "unhealthy", "error": str(e) or type(e).__name__}
+            check["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            checks[name] = check
+
+        healthy = all(check["status"] == "ok" for check in checks.values())
+        snapshot = {
+            "status": "ok" if healthy else "unhealthy",
+            "checked_at": time.time(),
+            "checks": checks,
+        }
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def _refresh_forever(self):
+        while True:
+            time.sleep(self.interval)
+            self.run_probes()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._refresh_forever, name="health-monitor", daemon=True)
+            self._thread.start()
+
+    def snapshot(self) -> dict:
+        """Return the cached probe results with their age in seconds."""
+        self._ensure_started()
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Nothing cached yet: probe once inline so the first answer is real
+            snapshot = self.run_probes()
+        return {**snapshot, "age": round(time.time() - snapshot["checked_at"], 3)}
@@ -0,0 +1,67 @@
+import typing as typ
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson, used for ``jsonify`` and ``request.get_json()``.
+
+    Output matches the default provider's types: datetimes and dataclasses are
+    passed through to Flask's ``default`` hook so they serialise the same way.
+    orjson always writes compact UTF-8, so ``separators`` and ``ensure_ascii``
+    are ignored. Anything orjson refuses (unknown keyword arguments, integers
+    beyond 64 bits) falls back to the stdlib encoder.
+    """
+
+    def _option(self, indent: typ.Optional[int] = None) -> int:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumps_bytes(self, obj: typ.Any, **kwargs: typ.Any) -> typ.Optional[bytes]:
+        kwargs.pop("separators", None)
+        kwargs.pop("ensure_ascii", None)
+        indent = kwargs.pop("indent", None)
+        if kwargs:
+            return None
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._option(indent))
+        except orjson.JSONEncodeError:
+            return None
+
+    def dumps(self, obj: typ.Any, **kwargs: typ.Any) -> str:
+        encoded = self._dumps_bytes(obj, **kwargs)
+        if encoded is None:
+            return super().dumps(obj, **kwargs)
+        return encoded.decode()
+
+    def loads(self, s: typ.Union[str, bytes], **kwargs: typ.Any) -> typ.Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: typ.Any, **kwargs: typ.Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        encoded = self._dumps_bytes(obj, indent=indent)
+        if encoded is None:
+            return super().response(obj)
+        # Hand orjson's bytes straight to the response, skipping a decode/encode round trip
+        return self._app.response_class(encoded + b"\n", mimetype=self.mimetype)
+
+
+def create_json_provider(app: Flask) -> JSONProvider:
+    """Return the fastest JSON provider available: orjson if installed, else Flask's default."""
+    if orjson is not None and app.config.get("JSON_PROVIDER", "auto") != "stdlib":
+        return OrjsonProvider(app)
+    return DefaultJSONProvider(app)
@@ -0,0 +1,172 @@
+import math
+import threading
+import time
+import typing as typ
+from collections import OrderedDict
+
+from flask import Flask, g, jsonify, request
+
+MAX_TRACKED_CLIENTS = 10000
+# How long after the last rejection the app still reports itself as shedding
+SHEDDING_WINDOW = 10.0
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated_at = now
+
+
+class ClientRateLimiter:
+    """
+    Per-client token buckets refilled at ``rate`` tokens per second up to ``burst``.
+
+    Only the ``MAX_TRACKED_CLIENTS`` most recently seen clients are tracked; a
+    forgotten client simply starts again with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, client: str) -> float:
+        """Take one token; return 0 on success or the seconds until a token is available."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.burst, now)
+                if len(self._buckets) > MAX_TRACKED_CLIENTS:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate)
+                bucket.updated_at = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return 0.0
+            return (1 - bucket.tokens) / self.rate
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit driven by observed request latency.
+
+    Every request finishing under ``target_latency`` grows the limit by
+    ``1 / limit`` (about one slot per limit's worth of requests); a slower one
+    shrinks it by ``backoff``, at most once per ``target_latency`` so a single
+    burst of slow requests does not collapse the limit. Requests beyond the
+    limit are rejected immediately instead of queueing behind slow ones.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        target_latency: float = 1.0,
+        backoff: float = 0.9,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency: float):
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            if latency > self.target_latency:
+                if now - self._last_decrease >= self.target_latency:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+
+class LoadShedder:
+    """
+    Rejects work early when the app is overloaded.
+
+    Requests first pass a per-client rate limit (429 when exceeded, disabled
+    when ``rate`` is 0) and then the adaptive concurrency limit (503 when
+    full); both answers carry ``Retry-After``. Exempt endpoints, such as the
+    health check, are never shed so they can report ``degraded`` instead.
+    """
+
+    def __init__(
+        self,
+        limiter: AdaptiveConcurrencyLimiter,
+        rate_limiter: typ.Optional[ClientRateLimiter] = None,
+        exempt_endpoints: typ.Iterable[str] = (),
+    ):
+        self.limiter = limiter
+        self.rate_limiter = rate_limiter
+        self.exempt_endpoints = frozenset(exempt_endpoints)
+        self.rejected_rate_limited = 0
+        self.rejected_overloaded = 0
+        self._last_rejection = -math.inf
+
+    def init_app(self, app: Flask):
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions["load_shedder"] = self
+
+    def is_shedding(self) -> bool:
+        return time.monotonic() - self._last_rejection < SHEDDING_WINDOW
+
+    @staticmethod
+    def _client() -> str:
+        # X-Forwarded-For is client-controlled; behind a proxy, ProxyFix
+        # (TRUSTED_PROXIES) rewrites remote_addr from the trusted hops only
+        return request.remote_addr or "unknown"
+
+    def _reject(self, status: int, error: str, retry_after: float):
+        response = jsonify({"error": error})
+        response.status_code = status
+        response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    def _before_request(self):
+        if request.endpoint in self.exempt_endpoints:
+            return None
+        if self.rate_limiter is not None:
+            wait = self.rate_limiter.acquire(self._client())
+            if wait:
+                self.rejected_rate_limited += 1
+                return self._reject(429, "Too many requests", wait)
+        if not self.limiter.acquire():
+            self.rejected_overloaded += 1
+            # Only overload counts as shedding; a rate-limited client does not degrade the app
+            self._last_rejection = time.monotonic()
+            return self._reject(503, "Server overloaded, retry later", 1)
+        g.shed_started = time.perf_counter()
+        return None
+
+    def _teardown_request(self, exc):
+        started = g.pop("shed_started", None)
+        if started is not None:
+            self.limiter.release(time.perf_counter() - started)
+
+    def metrics(self):
+        """Metrics collector exposing the limiter state."""
+        yield "load_shedding_concurrency_limit", "gauge", "Current adaptive concurrency limit.", int(self.limiter.limit)
+        yield "load_shedding_in_flight", "gauge", "Requests holding a concurrency slot.", self.limiter.in_flight
+        yield "load_shedding_rate_limited_total", "counter", "Requests rejected by the client rate limit.", self.rejected_rate_limited
+        yield "load_shedding_overloaded_total", "counter", "Requests rejected by the concurrency limit.", self.rejected_overloaded
+        yield "load_shedding_active", "gauge", "1 while the app is shedding load.", int(self.is_shedding())
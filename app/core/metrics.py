@@ -0,0 +1,153 @@
+import bisect
+import threading
+import time
+import typing as typ
+
+from flask import Flask, g, request
+
+# Upper bounds in seconds; the implicit last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STRIPES = 16
+
+# A collector returns extra samples as (name, type, help, value) at scrape time.
+Collector = typ.Callable[[], typ.Iterable[typ.Tuple[str, str, str, float]]]
+
+
+class _Stripe:
+    __slots__ = ("lock", "requests", "in_flight", "buckets", "sums")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests: typ.Dict[typ.Tuple[str, str, str], int] = {}
+        self.in_flight: typ.Dict[str, int] = {}
+        self.buckets: typ.Dict[typ.Tuple[str, str], typ.List[int]] = {}
+        self.sums: typ.Dict[typ.Tuple[str, str], float] = {}
+
+
+def _labels(**labels: str) -> str:
+    escaped = (
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class RequestMetrics:
+    """
+    Per-endpoint request counters, in-flight gauges and latency histograms.
+
+    Updates land on one of ``STRIPES`` independently locked stripes picked by
+    the OS thread id, so concurrent requests rarely touch the same lock; the
+    stripes are only summed when ``/metrics`` is scraped. Endpoints are labelled
+    by Flask endpoint name rather than raw path to keep label cardinality fixed.
+    """
+
+    def __init__(self):
+        self._stripes = [_Stripe() for _ in range(STRIPES)]
+        self._collectors: typ.List[Collector] = []
+
+    def init_app(self, app: Flask):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions["metrics"] = self
+
+    def register_collector(self, collector: Collector):
+        self._collectors.append(collector)
+
+    def _stripe(self) -> _Stripe:
+        return self._stripes[threading.get_native_id() % STRIPES]
+
+    @staticmethod
+    def _endpoint() -> str:
+        return request.endpoint or "unmatched"
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        endpoint = self._endpoint()
+        stripe = self._stripe()
+        with stripe.lock:
+            stripe.in_flight[endpoint] = stripe.in_flight.get(endpoint, 0) + 1
+
+    def _after_request(self, response):
+        started = g.get("metrics_started")
+        if started is None:
+            return response
+        duration = time.perf_counter() - started
+        endpoint = self._endpoint()
+        method = request.method
+        request_key = (endpoint, method, str(response.status_code))
+        latency_key = (endpoint, method)
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, duration)
+        stripe = self._stripe()
+        with stripe.lock:
+            stripe.requests[request_key] = stripe.requests.get(request_key, 0) + 1
+            buckets = stripe.buckets.get(latency_key)
+            if buckets is None:
+                buckets = stripe.buckets[latency_key] = [0] * (len(LATENCY_BUCKETS) + 1)
+            buckets[bucket] += 1
+            stripe.sums[latency_key] = stripe.sums.get(latency_key, 0.0) + duration
+        return response
+
+    def _teardown_request(self, exc):
+        if g.pop("metrics_started", None) is None:
+            return
+        endpoint = self._endpoint()
+        stripe = self._stripe()
+        with stripe.lock:
+            stripe.in_flight[endpoint] -= 1
+
+    def _merge(self):
+        requests: typ.Dict[typ.Tuple[str, str, str], int] = {}
+        in_flight: typ.Dict[str, int] = {}
+        buckets: typ.Dict[typ.Tuple[str, str], typ.List[int]] = {}
+        sums: typ.Dict[typ.Tuple[str, str], float] = {}
+        for stripe in self._stripes:
+            with stripe.lock:
+                for key, count in stripe.requests.items():
+                    requests[key] = requests.get(key, 0) + count
+                for key, count in stripe.in_flight.items():
+                    in_flight[key] = in_flight.get(key, 0) + count
+                for key, counts in stripe.buckets.items():
+                    merged = buckets.setdefault(key, [0] * len(counts))
+                    for index, count in enumerate(counts):
+                        merged[index] += count
+                for key, total in stripe.sums.items():
+                    sums[key] = sums.get(key, 0.0) + total
+        return requests, in_flight, buckets, sums
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        requests, in_flight, buckets, sums = self._merge()
+        lines = [
+            "# HELP http_requests_total Requests handled, by endpoint, method and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (endpoint, method, status), count in sorted(requests.items()):
+            lines.append(f"http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}")
+
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being handled, by endpoint.",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        for endpoint, count in sorted(in_flight.items()):
+            lines.append(f"http_requests_in_flight{_labels(endpoint=endpoint)} {count}")
+
+        lines += [
+            "# HELP http_request_duration_seconds Request latency, by endpoint and method.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (endpoint, method), counts in sorted(buckets.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), counts):
+                cumulative += count
+                labels = _labels(endpoint=endpoint, method=method, le=bound)
+                lines.append(f"http_request_duration_seconds_bucket{labels} {cumulative}")
+            labels = _labels(endpoint=endpoint, method=method)
+            lines.append(f"http_request_duration_seconds_sum{labels} {sums[(endpoint, method)]}")
+            lines.append(f"http_request_duration_seconds_count{labels} {cumulative}")
+
+        for collector in self._collectors:
+            for name, metric_type, help_text, value in collector():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,141 @@
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+import threading
+import time
+import typing as typ
+import uuid
+from collections import OrderedDict
+
+from flask import Flask, g, request
+
+from core.auth import request_is_authenticated
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:  # pragma: no cover - depends on the environment
+    SamplingProfiler = None
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_ARG = "profile"
+
+
+class ProfileStore:
+    """Keeps the ``maxlen`` most recent profiles in memory."""
+
+    def __init__(self, maxlen: int = 50):
+        self.maxlen = maxlen
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: dict):
+        with self._lock:
+            self._profiles[profile["id"]] = profile
+            while len(self._profiles) > self.maxlen:
+                self._profiles.popitem(last=False)
+
+    def list(self) -> typ.List[dict]:
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [{k: v for k, v in p.items() if k not in ("data", "summary")} for p in reversed(profiles)]
+
+    def get(self, profile_id: str) -> typ.Optional[dict]:
+        return self._profiles.get(profile_id)
+
+
+class RequestProfiler:
+    """
+    Profiles selected requests and keeps the results for ``/debug/profiles``.
+
+    A request is profiled when it carries ``X-Profile: 1`` or ``?profile=1``
+    with a valid token, or when it is picked by the 1 in ``sample_rate``
+    continuous sampling (0 disables sampling). pyinstrument's sampling
+    profiler is used when installed since its overhead does not depend on call
+    counts; otherwise cProfile, whose stats download as a ``.prof`` file.
+    """
+
+    def __init__(self, store: ProfileStore, sample_rate: int = 0):
+        self.store = store
+        self.sample_rate = sample_rate
+        self._counter = itertools.count(1)
+
+    def init_app(self, app: Flask):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions["profiler"] = self
+
+    def _requested(self) -> bool:
+        flag = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_QUERY_ARG)
+        return flag in ("1", "true") and request_is_authenticated()
+
+    def _sampled(self) -> bool:
+        return self.sample_rate > 0 and next(self._counter) % self.sample_rate == 0
+
+    def _before_request(self):
+        if request.endpoint is None or request.blueprint == "debug":
+            return
+        trigger = "requested" if self._requested() else "sampled" if self._sampled() else None
+        if trigger is None:
+            return
+        profiler = SamplingProfiler() if SamplingProfiler is not None else cProfile.Profile()
+        try:
+            if SamplingProfiler is not None:
+                profiler.start()
+            else:
+                profiler.enable()
+        except (RuntimeError, ValueError):
+            # Another profiler is already running on this interpreter
+            return
+        g.profiler = (profiler, trigger, time.perf_counter())
+
+    @staticmethod
+    def _stop(profiler):
+        if SamplingProfiler is not None:
+            profiler.stop()
+        else:
+            profiler.disable()
+
+    def _after_request(self, response):
+        state = g.pop("profiler", None)
+        if state is None:
+            return response
+        profiler, trigger, started = state
+        self._stop(profiler)
+        duration = time.perf_counter() - started
+
+        if SamplingProfiler is not None:
+            data = profiler.output_html().encode()
+            summary = profiler.output_text()
+            profile_format = "html"
+        else:
+            profiler.create_stats()
+            data = marshal.dumps(profiler.stats)
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(30)
+            summary = text.getvalue()
+            profile_format = "prof"
+
+        self.store.add({
+            "id": uuid.uuid4().hex,
+            "created_at": time.time(),
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 3),
+            "trigger": trigger,
+            "format": profile_format,
+            "size": len(data),
+            "data": data,
+            "summary": summary,
+        })
+        return response
+
+    def _teardown_request(self, exc):
+        # Only left set when the request failed before after_request ran
+        state = g.pop("profiler", None)
+        if state is not None:
+            self._stop(state[0])
@@ -0,0 +1,143 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import sys
+import time
+import typing as typ
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import Flask, g, has_request_context, request
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Extra attributes copied from log records into the JSON line when present
+EXTRA_FIELDS = ("request_id", "method", "path", "route", "status", "duration_ms")
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                line[field] = value
+        # DroppingQueueHandler.prepare leaves the traceback text in exc_text
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line["exc_info"] = record.exc_text
+        return json.dumps(line, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Tags every record logged while handling a request with that request's id and route."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if has_request_context() and getattr(record, "request_id", None) is None:
+            record.request_id = g.get("request_id")
+            record.route = request.endpoint
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the logging thread.
+
+    When the bounded queue is full the record is dropped and counted instead,
+    so a stalled stdout shows up as a drop counter rather than request latency.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Freeze the record for the listener thread.
+
+        The default folds the traceback into ``msg``; here the message and the
+        traceback are rendered separately (``exc_text``) so ``JsonFormatter``
+        can keep them in their own fields. The traceback objects are dropped
+        either way so queued records do not keep request frames alive.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _TRACEBACK_FORMATTER.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestLogging:
+    """
+    Structured JSON logging for the app, written off the request thread.
+
+    ``app.logger`` hands records to a bounded queue; a ``QueueListener``
+    thread formats them and does the blocking write to stdout. Every request
+    gets an id (taken from ``X-Request-ID`` or generated), echoed back in the
+    response, and one access line with route, status and duration.
+    """
+
+    def __init__(self, level: str = "INFO", queue_size: int = 10000, stream: typ.TextIO = sys.stdout):
+        self.level = level
+        self.queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.handler.addFilter(RequestContextFilter())
+        output = logging.StreamHandler(stream)
+        output.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.queue, output, respect_handler_level=True)
+
+    def init_app(self, app: Flask):
+        app.logger.handlers = [self.handler]
+        app.logger.setLevel(self.level)
+        app.logger.propagate = False
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+        app.extensions["request_logging"] = self
+        self._logger = app.logger
+
+    @staticmethod
+    def _before_request():
+        g.request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        g.log_started = time.perf_counter()
+
+    def _after_request(self, response):
+        started = g.get("log_started")
+        if started is None:
+            return response
+        response.headers[REQUEST_ID_HEADER] = g.request_id
+        if self._logger.isEnabledFor(logging.INFO):
+            self._logger.info(
+                "request",
+                extra={
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                },
+            )
+        return response
+
+    def metrics(self):
+        """Metrics collector exposing the log queue state."""
+        yield "log_queue_size", "gauge", "Log records waiting to be written.", self.queue.qsize()
+        yield "log_records_dropped_total", "counter", "Log records dropped because the queue was full.", self.handler.dropped